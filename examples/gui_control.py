@@ -6,8 +6,9 @@ import subprocess
 import pyaudio
 import tkinter.ttk as ttk
 import tkinter as tk
-from tkinter import Frame, RAISED, BOTH, Button, RIGHT, Canvas, Scale, HORIZONTAL, Label
+from tkinter import Frame, RAISED, BOTH, Button, RIGHT, Label
 import mebo2_nabot
+from mebo2_nabot import teleop
 
 class MicrophoneCapture:
     def __init__(self):
@@ -56,6 +57,7 @@ class GraphicalInterface():
         self.stop_robot = False
         self.logger = logging.getLogger('GUI')
         self.robot_ctrl = mebo2_nabot.Robot()
+        self.teleop = teleop.TeleopController(self.robot_ctrl)
         self.logger.info("Starting ffplay...")
         self.start_ffplay()
         self.robot_speaker = mebo2_nabot.Robot.Speaker(
@@ -95,6 +97,7 @@ class GraphicalInterface():
     def on_closing(self):
         self.logger.info("Stopping Robot...")
         self.stop_robot = True
+        self.teleop.stop()
         self.robot_ctrl.claw_led_off()
         self.robot_ctrl.stop()
         self.stop_ffplay()
@@ -126,26 +129,6 @@ class GraphicalInterface():
             self.ffplay_process.wait()
             self.logger.info("ffplay process terminated.")
 
-    def robot_controller(self):
-        if self.stop_robot:
-            return
-
-        if self.enable_joysticks:
-            x = -self.canvas.joystick_x
-            y = -self.canvas.joystick_y
-            v = (100 - abs(x)) * (y / 100) + y
-            w = (100 - abs(y)) * (x / 100) + x 
-            x = (v - w) // 2
-            y = (v + w) // 2
-
-            command_to_send = {self.robot_ctrl.Command.WHEEL_LEFT_FORWARD: x, self.robot_ctrl.Command.WHEEL_RIGHT_FORWARD:y, \
-                               self.robot_ctrl.Command.ARM_UP:self.scale1.get(), self.robot_ctrl.Command.WRIST_UD_UP:self.scale2.get(), \
-                                self.robot_ctrl.Command.WRIST_ROTATE_LEFT:self.scale4.get(), \
-                                    self.robot_ctrl.Command.CLAW_POSITION:self.scale3.get()}
-            self.robot_ctrl.send_joint_values(command_to_send)
-
-        self.parent.after(10, self.robot_controller)
-
     def create_widgets(self):
         self.main_frame.style = ttk.Style()
         self.main_frame.winfo_toplevel().title("Controls")
@@ -153,78 +136,28 @@ class GraphicalInterface():
         self.main_frame.configure(background='black')
 
         def create_canvas():
-            class Joystick(tk.Canvas):
-                pass
-
-            self.canvas = Joystick(self.main_frame, width=400, height=400)
-            self.canvas.joystick_x = 0
-            self.canvas.joystick_y = 0
-            self.canvas.is_moving = False
-
-            def paint(event):
-                reset_canvas()
-                self.canvas.create_oval(0, 0, 400, 400, fill='black', outline='gray')
-                x1, y1 = event.x - 75, event.y - 75
-                x2, y2 = event.x + 75, event.y + 75
-                self.canvas.create_oval(x1, y1, x2, y2, fill='blue')
-
-                self.canvas.joystick_x = (event.x - 200) * 7 / 10
-                self.canvas.joystick_y = (event.y - 200) * 7 / 10
-
-                self.canvas.joystick_x = min(max(self.canvas.joystick_x, -100), 100)
-                self.canvas.joystick_y = min(max(self.canvas.joystick_y, -100), 100)
-
-            def reset(event):
-                self.canvas.is_moving = False
-                self.canvas.joystick_x = 0
-                self.canvas.joystick_y = 0
-                reset_canvas()
-
-            def reset_canvas():
-                self.canvas.create_rectangle(0, 0, 400, 400)
-                self.canvas.create_oval(0, 0, 400, 400, fill='black', outline='gray')
-                self.canvas.create_oval(125, 125, 275, 275, fill='gray')
+            Command = self.robot_ctrl.Command
 
+            self.canvas = teleop.Joystick(self.main_frame, command=self.teleop.drive)
             self.canvas.pack()
 
-            self.canvas.bind('<B1-Motion>', paint)
-            self.canvas.bind('<ButtonRelease-1>', reset)
-            reset_canvas()
-
             self.controls_frame = Frame(self.main_frame)
             self.controls_frame.pack(fill='x', expand=True)
 
-            def scale1_command(val):
-                val = self.scale1.get()
-
-            def scale1_stop(event):
-                self.scale1.set(0)
-
-            self.scale1 = Scale(self.controls_frame, from_=100, to=-100, label='Arm', command=scale1_command)
-            self.scale1.bind('<ButtonRelease-1>', scale1_stop)
+            self.scale1 = teleop.Slider(self.controls_frame, from_=100, to=-100, orient='vertical', label='Arm',
+                                        command=lambda value: self.teleop.set(Command.ARM_UP, value))
             self.scale1.pack(side='left')
 
-            def scale2_command(val):
-                val = self.scale2.get()
-
-            def scale2_stop(event):
-                self.scale2.set(0)
-
-            self.scale2 = Scale(self.controls_frame, from_=100, to=-100, label='Elbow', command=scale2_command)
-            self.scale2.bind('<ButtonRelease-1>', scale2_stop)
+            self.scale2 = teleop.Slider(self.controls_frame, from_=100, to=-100, orient='vertical', label='Elbow',
+                                        command=lambda value: self.teleop.set(Command.WRIST_UD_UP, value))
             self.scale2.pack(side='left')
 
-            self.scale3 = Scale(self.controls_frame, from_=0, to=100, orient=HORIZONTAL, label='Claw')
+            self.scale3 = teleop.Slider(self.controls_frame, from_=0, to=100, spring=False, label='Claw',
+                                        command=lambda value: self.teleop.set(Command.CLAW_POSITION, value))
             self.scale3.pack(side='top')
 
-            def scale4_command(val):
-                val = self.scale4.get()
-
-            def scale4_stop(event):
-                self.scale4.set(0)
-
-            self.scale4 = Scale(self.controls_frame, from_=-100, to=100, orient=HORIZONTAL, command=scale4_command, label='Wrist')
-            self.scale4.bind('<ButtonRelease-1>', scale4_stop)
+            self.scale4 = teleop.Slider(self.controls_frame, from_=-100, to=100, label='Wrist',
+                                        command=lambda value: self.teleop.set(Command.WRIST_ROTATE_LEFT, value))
             self.scale4.pack(side='top')
 
             def button1_command():
@@ -270,7 +203,7 @@ class GraphicalInterface():
             update_battery()
 
         create_canvas()
-        self.robot_controller()
+        self.teleop.start()
 
 if __name__ == "__main__":
     logging.basicConfig(format='%(asctime)s  %(name)s  %(levelname)s: %(message)s', level=logging.INFO)
@@ -3,12 +3,14 @@ import mebo2_nabot
 from ultralytics import YOLO    
 
 if __name__ == "__main__":
-    video = mebo2_nabot.Robot.Camera()
+    video = mebo2_nabot.Robot.Camera(threaded=True)
     model = YOLO("yolo11n.pt")
+    # only run detection when something in view changes
+    gate = mebo2_nabot.SceneChangeGate()
     video.open()
 
     while True:
-        frame = video.read()
+        frame = gate.read(video)
 
         results = model(frame)
         annotated_frame = results[0].plot()
@@ -11,15 +11,15 @@ class VoskSpeechRecognizer:
         self.recognizer = KaldiRecognizer(self.model, rate)
         self.robot = mebo2_nabot.Robot()
 
-    def process_stream(self, audio_stream):
+    def process_stream(self, speech_segments):
         print("Listening for speech...")
-        for chunk in audio_stream:
-            if self.recognizer.AcceptWaveform(chunk.tobytes()):
-                result = json.loads(self.recognizer.Result())
-                text = result.get("text", "")
-                if text:
-                    print("Detected speech:", text)
-                    self.translate_text_to_command(text)
+        for segment in speech_segments:
+            self.recognizer.AcceptWaveform(segment.audio.tobytes())
+            result = json.loads(self.recognizer.FinalResult())
+            text = result.get("text", "")
+            if text:
+                print("Detected speech:", text)
+                self.translate_text_to_command(text)
 
     def translate_text_to_command(self, text):
         text = text.lower()
@@ -44,7 +44,7 @@ def start_speech_recognition():
 
     recognizer = VoskSpeechRecognizer(rate=16000)
 
-    recognition_thread = threading.Thread(target=recognizer.process_stream, args=(audio_input.read(),))
+    recognition_thread = threading.Thread(target=recognizer.process_stream, args=(audio_input.read_speech(),))
     recognition_thread.daemon = True
     recognition_thread.start()
 
@@ -1,3 +1,16 @@
 from .robot import Robot
+from .audio import AlawEncoder, AlawSender, AudioBus, AudioSubscriber, ClipCache, Mixer, MixerSource, Pacer, Resampler, SpeechSegment, VoiceActivityDetector
+from .battery import BatteryEstimator
+from .clock import Clock, VirtualClock
+from .events import Event, EventListener
+from .framebus import FrameBroker, FrameSubscriber
+from .pipeline import Pipeline, Stage
+from .recorder import CommandRecorder, CommandReplayer
+from .recording import Segment, StreamRecorder
+from .relay import MediaRelay, SyntheticCamera
+from .registers import RegisterMap
+from .telemetry import TelemetryRecorder, TelemetryReader
+from .transport import FakeTransport, HttpTransport
+from .vision import Preprocessor, SceneChangeGate
 
-__all__ = ["Robot"]
+__all__ = ["Robot", "BatteryEstimator", "CommandRecorder", "CommandReplayer", "MediaRelay", "SyntheticCamera", "Event", "EventListener", "FrameBroker", "FrameSubscriber", "Pipeline", "Stage", "RegisterMap", "Segment", "StreamRecorder", "TelemetryRecorder", "TelemetryReader", "Preprocessor", "SceneChangeGate", "SpeechSegment", "VoiceActivityDetector", "AudioBus", "AudioSubscriber", "AlawEncoder", "AlawSender", "Resampler", "ClipCache", "Pacer", "Mixer", "MixerSource", "Clock", "VirtualClock", "HttpTransport", "FakeTransport"]
@@ -0,0 +1,1104 @@
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque, namedtuple
+import numpy as np
+from .clock import Clock
+
+#: numpy dtypes of the raw sample formats understood by AlawEncoder, by ffmpeg name
+SAMPLE_FORMATS = {
+    'u8': np.dtype('u1'),
+    's16le': np.dtype('<i2'),
+    's16be': np.dtype('>i2'),
+    's32le': np.dtype('<i4'),
+    'f32le': np.dtype('<f4'),
+    'f64le': np.dtype('<f8')
+}
+
+def _build_alaw_table():
+    """G.711 A-law code of every int16 value, indexed by the value viewed as uint16."""
+    pcm = np.arange(-32768, 32768, dtype=np.int32) >> 3
+    negative = pcm < 0
+    pcm = np.where(negative, -pcm - 1, pcm)
+    mask = np.where(negative, 0x55, 0xD5)
+    segment = np.searchsorted(np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF]), pcm)
+    shift = np.maximum(segment, 1)
+    code = (np.minimum(segment, 7) << 4) | ((pcm >> np.minimum(shift, 7)) & 0x0F)
+    code = np.where(segment >= 8, 0x7F, code) ^ mask
+    table = np.empty(65536, dtype=np.uint8)
+    table[np.arange(-32768, 32768).astype(np.int16).view(np.uint16)] = code
+    return table
+
+_ALAW_TABLE = _build_alaw_table()
+
+def alaw_encode(samples):
+    """Encode int16 samples as G.711 A-law.
+
+    Args:
+        samples (numpy.ndarray): int16 samples
+
+    Returns:
+        numpy.ndarray: One uint8 A-law code per sample
+    """
+    return _ALAW_TABLE[np.asarray(samples, dtype=np.int16).view(np.uint16)]
+
+def _build_alaw_decode_table():
+    """float32 value in -1 to 1 of every A-law code."""
+    code = np.arange(256) ^ 0x55
+    segment = (code & 0x70) >> 4
+    value = ((code & 0x0F) << 4) + np.where(segment == 0, 8, 0x108)
+    value = np.where(segment > 1, value << np.maximum(segment - 1, 0), value)
+    return (np.where(code & 0x80, value, -value) / 32768).astype(np.float32)
+
+_ALAW_DECODE_TABLE = _build_alaw_decode_table()
+
+def alaw_decode(data):
+    """Decode G.711 A-law to float samples.
+
+    Args:
+        data (bytes or numpy.ndarray): A-law codes
+
+    Returns:
+        numpy.ndarray: float32 samples in -1 to 1
+    """
+    return _ALAW_DECODE_TABLE[np.frombuffer(data, dtype=np.uint8)]
+
+class Resampler():
+    """Streaming sample rate converter for float audio.
+
+    Downsampling first applies a windowed sinc low-pass filter against
+    aliasing, then samples are linearly interpolated to the new rate. Filter
+    history and the interpolation phase carry over between calls, so audio
+    can be converted in chunks of any size without clicks at the seams.
+
+    Args:
+        rate_in (int): Input sample rate
+        rate_out (int): Output sample rate
+        taps (int): Low-pass filter length (default 31)
+    """
+
+    def __init__(self, rate_in, rate_out, taps=31):
+        self.rate_in = rate_in
+        self.rate_out = rate_out
+        self.step = rate_in / rate_out
+        self._taps = None
+        if rate_out < rate_in:
+            cutoff = 0.45 * rate_out / rate_in
+            n = np.arange(taps) - (taps - 1) / 2
+            self._taps = (2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)).astype(np.float32)
+            self._taps /= self._taps.sum()
+            self._history = np.zeros(taps - 1, dtype=np.float32)
+        self._last = np.zeros(1, dtype=np.float32)
+        self._phase = 0.0
+
+    def __call__(self, samples):
+        """Convert the next chunk of audio.
+
+        Args:
+            samples (numpy.ndarray): float32 mono samples at rate_in
+
+        Returns:
+            numpy.ndarray: float32 mono samples at rate_out
+        """
+        if self.rate_in == self.rate_out:
+            return samples
+        if self._taps is not None:
+            padded = np.concatenate((self._history, samples))
+            self._history = padded[len(padded) - len(self._history):]
+            samples = np.convolve(padded, self._taps, mode='valid').astype(np.float32)
+
+        # interpolate between the last sample of the previous chunk and this one
+        source = np.concatenate((self._last, samples))
+        positions = np.arange(self._phase, len(source) - 1, self.step)
+        self._phase = (positions[-1] + self.step if len(positions) else self._phase) - (len(source) - 1)
+        self._last = source[-1:]
+        return np.interp(positions, np.arange(len(source)), source).astype(np.float32)
+
+class AlawEncoder():
+    """Convert raw audio to the robot's native 8 kHz mono A-law.
+
+    Raw bytes or arrays are converted to float, mixed down to mono,
+    resampled to 8 kHz and A-law encoded, all with vectorized NumPy code.
+    Partial sample frames are kept for the next call, so data can be fed in
+    pieces of any size.
+
+    Args:
+        rate (int): Input sample rate
+        channels (int): Input channels (default 1)
+        input_format (str): Input sample format, one of SAMPLE_FORMATS (default "s16le")
+    """
+
+    #: int: Sample rate the robot's speaker plays
+    RATE = 8000
+
+    def __init__(self, rate, channels=1, input_format="s16le"):
+        if input_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unsupported sample format: {input_format}")
+        self.rate = rate
+        self.channels = channels
+        self.dtype = SAMPLE_FORMATS[input_format]
+        self.resampler = Resampler(rate, self.RATE)
+        self._frame_bytes = self.dtype.itemsize * channels
+        self._carry = b''
+
+    def to_float(self, data):
+        """Convert raw audio to float32 mono samples in -1 to 1.
+
+        Args:
+            data (bytes or numpy.ndarray): Whole sample frames in the input format
+
+        Returns:
+            numpy.ndarray: float32 mono samples at the input rate
+        """
+        samples = np.frombuffer(data, dtype=self.dtype)
+        if self.dtype.kind == 'u':
+            samples = (samples.astype(np.float32) - 128) / 128
+        elif self.dtype.kind == 'i':
+            samples = samples.astype(np.float32) / float(2 ** (8 * self.dtype.itemsize - 1))
+        else:
+            samples = samples.astype(np.float32)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+        return samples
+
+    def convert(self, data):
+        """Convert the next piece of audio to float samples at 8 kHz.
+
+        Args:
+            data (bytes or numpy.ndarray): Raw audio in the input format
+
+        Returns:
+            numpy.ndarray: float32 mono samples at 8 kHz
+        """
+        if isinstance(data, np.ndarray):
+            data = np.ascontiguousarray(data).tobytes()
+        if self._carry:
+            data = self._carry + data
+        whole = len(data) - len(data) % self._frame_bytes
+        self._carry = data[whole:]
+        return self.resampler(self.to_float(data[:whole]))
+
+    def encode(self, data):
+        """Encode the next piece of audio.
+
+        Args:
+            data (bytes or numpy.ndarray): Raw audio in the input format
+
+        Returns:
+            bytes: A-law audio at 8 kHz, may be empty if data held less than one output sample
+        """
+        pcm = np.clip(self.convert(data) * 32768, -32768, 32767).astype(np.int16)
+        return alaw_encode(pcm).tobytes()
+
+class AlawSender():
+    """Send A-law audio to the robot's speaker as UDP datagrams.
+
+    Audio is cut into packets of ``packet_size`` bytes; a partial packet
+    waits for more audio or a flush.
+
+    Args:
+        host (str): Robot address (default "192.168.99.1")
+        port (int): Robot audio port (default 8828)
+        packet_size (int): Bytes per datagram, 160 bytes is 20 ms of audio (default 160)
+    """
+
+    def __init__(self, host="192.168.99.1", port=8828, packet_size=160):
+        self.host = host
+        self.port = port
+        self.packet_size = packet_size
+        self.logger = logging.getLogger('Speaker')
+        #: int: Datagrams sent
+        self.packets = 0
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.connect((host, port))
+        self._pending = bytearray()
+
+    def _send(self, packet):
+        try:
+            self.socket.send(packet)
+            self.packets += 1
+        except ConnectionRefusedError:
+            # an earlier datagram was rejected, the robot isn't listening yet
+            self.logger.debug("Speaker port refused audio")
+
+    def send(self, data):
+        """Queue audio and send every complete packet.
+
+        Args:
+            data (bytes or numpy.ndarray): A-law audio
+        """
+        self._pending += memoryview(data)
+        whole = len(self._pending) - len(self._pending) % self.packet_size
+        with memoryview(self._pending) as view:
+            for i in range(0, whole, self.packet_size):
+                self._send(view[i:i + self.packet_size])
+        del self._pending[:whole]
+
+    def flush(self):
+        """Send the partial packet left over, if any."""
+        if self._pending:
+            self._send(bytes(self._pending))
+            self._pending.clear()
+
+    def close(self):
+        """Flush and close the socket."""
+        self.flush()
+        self.socket.close()
+
+class Pacer():
+    """Schedule real-time audio against absolute deadlines.
+
+    Every chunk is given a slot on a continuous timeline anchored to
+    the clock's monotonic time, so time spent encoding and sending doesn't add up
+    to drift. Chunks are released up to ``lead`` seconds before they play,
+    which keeps a small jitter buffer at the robot without letting latency
+    grow. If a source falls behind and the buffer runs dry the timeline is
+    restarted and the gap counted in ``underruns``. Several sources can
+    share one pacer, their chunks are scheduled one after the other.
+
+    Args:
+        lead (float): Seconds of audio to keep queued ahead of playback (default 0.06)
+        clock (Clock, optional): Clock to schedule against, e.g. a VirtualClock in tests (default real time)
+    """
+
+    def __init__(self, lead=0.06, clock=None):
+        self.lead = lead
+        self.clock = clock or Clock()
+        #: int: Times the buffer ran dry in the middle of a stream
+        self.underruns = 0
+        #: float: Seconds the last chunk was released after its deadline, late chunks included
+        self.drift = 0.0
+        #: float: Largest drift seen
+        self.max_drift = 0.0
+        self._origin = None
+        self._position = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def buffered(self):
+        """float: Seconds of scheduled audio that haven't played yet"""
+        if self._origin is None:
+            return 0.0
+        return max(0.0, self._origin + self._position - self.clock.monotonic())
+
+    def reset(self):
+        """Mark the start of a new stream.
+
+        A gap before the next chunk isn't counted as an underrun, audio
+        still queued from other sources keeps its place.
+        """
+        with self._lock:
+            if not self.buffered:
+                self._origin = None
+
+    def wait(self, duration):
+        """Block until the next chunk should be sent.
+
+        Args:
+            duration (float): Length of the chunk in seconds
+        """
+        with self._lock:
+            now = self.clock.monotonic()
+            if self._origin is None or now > self._origin + self._position:
+                if self._origin is not None:
+                    self.underruns += 1
+                self._origin = now
+                self._position = 0.0
+            # the first chunks of a timeline are due as soon as it starts
+            deadline = max(self._origin + self._position - self.lead, self._origin)
+            self._position += duration
+
+        self.clock.sleep(deadline - self.clock.monotonic())
+        self.drift = self.clock.monotonic() - deadline
+        self.max_drift = max(self.max_drift, self.drift)
+
+def decode_file(file, input_format=None, chunk_size=1600):
+    """Generator that decodes an audio file with ffmpeg into A-law.
+
+    Args:
+        file (str): Path of the audio file, any format ffmpeg can read
+        input_format (str, optional): Force the input format instead of letting ffmpeg detect it
+        chunk_size (int): Samples per yielded chunk (default 1600)
+
+    Yields:
+        bytes: 8 kHz mono A-law audio
+    """
+    ffmpeg_cmd = ['ffmpeg', '-loglevel', 'quiet']
+    if input_format:
+        ffmpeg_cmd += ['-f', input_format]
+    ffmpeg_cmd += ['-i', file, '-f', 's16le', '-ac', '1', '-ar', str(AlawEncoder.RATE), '-']
+
+    encoder = AlawEncoder(AlawEncoder.RATE)
+    process = subprocess.Popen(ffmpeg_cmd, stdout=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read(2 * chunk_size)
+            if not data:
+                break
+            yield encoder.encode(data)
+    finally:
+        process.kill()
+        process.wait()
+
+class ClipCache():
+    """Cache of audio files encoded to the robot's native A-law format.
+
+    Each file is decoded and encoded once and stored in the cache
+    directory under the hash of its content, so renamed or copied files
+    share an entry and edited files get a new one. Cached clips are memory
+    mapped for playback. When the cache grows past ``max_bytes`` the least
+    recently played clips are deleted.
+
+    Args:
+        directory (str, optional): Where to store clips (default "~/.cache/mebo2_nabot/clips")
+        max_bytes (int): Total size of cached clips to keep (default 50 MB)
+        input_format (str, optional): Force the input format instead of letting ffmpeg detect it
+    """
+
+    def __init__(self, directory=None, max_bytes=50 * 1024 * 1024, input_format=None):
+        self.directory = os.path.expanduser(directory or "~/.cache/mebo2_nabot/clips")
+        self.max_bytes = max_bytes
+        self.input_format = input_format
+        self.logger = logging.getLogger('Clip Cache')
+        #: int: Clips served from the cache
+        self.hits = 0
+        #: int: Clips that had to be encoded
+        self.misses = 0
+        self._keys = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, file):
+        """Return the cache key of a file, the hash of its content.
+
+        The hash is remembered while the file's size and modification time stay the same.
+
+        Args:
+            file (str): Path of the audio file
+
+        Returns:
+            str: Hex digest
+        """
+        stat = os.stat(file)
+        identity = (os.path.abspath(file), stat.st_size, stat.st_mtime_ns)
+        if identity not in self._keys:
+            digest = hashlib.sha256(str(self.input_format).encode())
+            with open(file, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            self._keys[identity] = digest.hexdigest()
+        return self._keys[identity]
+
+    def path(self, file):
+        """Return where the encoded clip of a file is stored.
+
+        Args:
+            file (str): Path of the audio file
+
+        Returns:
+            str: Path of the A-law clip, which may not exist yet
+        """
+        return os.path.join(self.directory, self.key(file) + ".alaw")
+
+    def get(self, file):
+        """Return the encoded clip of a file, encoding it on the first request.
+
+        Args:
+            file (str): Path of the audio file
+
+        Returns:
+            numpy.ndarray: Memory mapped 8 kHz mono A-law bytes
+        """
+        path = self.path(file)
+        with self._lock:
+            if os.path.exists(path):
+                self.hits += 1
+                # modification time orders clips for eviction
+                os.utime(path)
+            else:
+                self.misses += 1
+                fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        for chunk in decode_file(file, self.input_format):
+                            f.write(chunk)
+                    os.replace(tmp, path)
+                except BaseException:
+                    os.remove(tmp)
+                    raise
+                self.logger.info(f"Encoded {file} into cache")
+                self.evict(keep=path)
+
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(path, dtype=np.uint8, mode='r')
+
+    def size(self):
+        """Return the total size of the cached clips.
+
+        Returns:
+            int: Bytes
+        """
+        return sum(os.path.getsize(path) for path, _ in self._clips())
+
+    def _clips(self):
+        """List (path, last use) of the cached clips, least recently used first."""
+        clips = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".alaw"):
+                path = os.path.join(self.directory, name)
+                clips.append((path, os.path.getmtime(path)))
+        return sorted(clips, key=lambda clip: clip[1])
+
+    def evict(self, keep=None):
+        """Delete least recently used clips until the cache fits in max_bytes.
+
+        Args:
+            keep (str, optional): Clip path that must not be deleted
+
+        Returns:
+            int: Number of clips deleted
+        """
+        clips = [path for path, _ in self._clips()]
+        sizes = [os.path.getsize(path) for path in clips]
+        total = sum(sizes)
+        deleted = 0
+        for path, size in zip(clips, sizes):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            # open memory maps of the clip stay valid after it is deleted
+            os.remove(path)
+            total -= size
+            deleted += 1
+        return deleted
+
+    def clear(self):
+        """Delete all cached clips."""
+        with self._lock:
+            for path, _ in self._clips():
+                os.remove(path)
+            self._keys.clear()
+
+class MixerSource():
+    """One input of a Mixer, created by its play and open methods.
+
+    Args:
+        mixer (Mixer): Mixer playing the source
+        gain (float): Volume multiplier
+        priority (int): Sources with a lower priority are ducked while this one plays
+        encoder (AlawEncoder, optional): Converter for raw audio written to the source
+    """
+
+    def __init__(self, mixer, gain, priority, encoder=None):
+        self.mixer = mixer
+        self.gain = gain
+        self.priority = priority
+        self.encoder = encoder
+        #: int: Blocks mixed while a live source had no audio
+        self.underruns = 0
+        self._chunks = deque()
+        self._offset = 0
+        self._queued = 0
+        self._applied_gain = gain
+        self._closed = False
+        self._stopped = False
+        self._cond = threading.Condition()
+
+    @property
+    def queued(self):
+        """float: Seconds of audio waiting to be mixed"""
+        return self._queued / AlawEncoder.RATE
+
+    @property
+    def done(self):
+        """bool: True once the source finished playing or was stopped"""
+        return self._stopped or (self._closed and not self._queued)
+
+    def push(self, samples, max_queued=None):
+        """Queue float samples at 8 kHz.
+
+        Args:
+            samples (numpy.ndarray): float32 mono samples in -1 to 1
+            max_queued (float, optional): Block while more than this many seconds are queued
+        """
+        with self._cond:
+            if max_queued is not None:
+                self._cond.wait_for(lambda: self.queued <= max_queued or self._stopped)
+            if self._stopped or not len(samples):
+                return
+            self._chunks.append(samples)
+            self._queued += len(samples)
+
+    def write(self, data):
+        """Queue raw audio in the format the source was opened with.
+
+        Args:
+            data (bytes or numpy.ndarray): Raw audio
+        """
+        self.push(self.encoder.convert(data))
+
+    def close(self):
+        """End the input, the source finishes once its queued audio has played."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stop(self):
+        """Stop playing immediately, dropping queued audio."""
+        with self._cond:
+            self._stopped = True
+            self._chunks.clear()
+            self._queued = 0
+            self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """Block until the source is done.
+
+        Args:
+            timeout (float, optional): Seconds to wait
+
+        Returns:
+            bool: True if the source is done
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done, timeout)
+
+    def _take(self, out):
+        """Fill out with queued samples, returns how many were available."""
+        with self._cond:
+            filled = 0
+            while filled < len(out) and self._chunks:
+                chunk = self._chunks[0]
+                count = min(len(out) - filled, len(chunk) - self._offset)
+                out[filled:filled + count] = chunk[self._offset:self._offset + count]
+                filled += count
+                self._offset += count
+                if self._offset == len(chunk):
+                    self._chunks.popleft()
+                    self._offset = 0
+            self._queued -= filled
+            if filled < len(out) and not self._closed:
+                self.underruns += 1
+            self._cond.notify_all()
+            return filled
+
+class Mixer():
+    """Play several audio sources at once through one encoder and socket.
+
+    Every ``block`` samples the mixer takes audio from each source, applies
+    its gain and sums all sources in one vectorized step, then clips the
+    mix and sends it as a single 8 kHz A-law stream. While a source plays,
+    sources with a lower priority are ducked to ``duck_gain`` of their
+    volume. Gain changes are ramped over a block to avoid clicks.
+
+    Args:
+        host (str): Robot address (default "192.168.99.1")
+        port (int): Robot audio port (default 8828)
+        block (int): Samples mixed at a time, 160 samples is 20 ms (default 160)
+        duck_gain (float): Volume multiplier for ducked sources (default 0.3)
+        pacer (Pacer, optional): Pacer for the mixed stream (default a new Pacer)
+        cache (ClipCache, optional): Cache used by play_file
+    """
+
+    def __init__(self, host="192.168.99.1", port=8828, block=160, duck_gain=0.3, pacer=None, cache=None):
+        self.block = block
+        self.duck_gain = duck_gain
+        self.pacer = pacer or Pacer()
+        self.cache = cache
+        self.sender = AlawSender(host, port, packet_size=block)
+        self.logger = logging.getLogger('Mixer')
+        self.sources = []
+        self._lock = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start the mixing thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop all sources and the mixing thread."""
+        with self._lock:
+            self._running = False
+            sources, self.sources = self.sources, []
+            self._lock.notify_all()
+        for source in sources:
+            source.stop()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.sender.close()
+
+    def _add(self, source, preempt):
+        with self._lock:
+            if preempt:
+                for other in self.sources:
+                    if other.priority < source.priority:
+                        other.stop()
+            self.sources.append(source)
+            self._lock.notify_all()
+        return source
+
+    def play_array(self, array, rate, channels=1, input_format="s16le", gain=1.0, priority=0, preempt=False):
+        """Play a NumPy array.
+
+        Args:
+            array (numpy.ndarray): Audio to play
+            rate (int): Sample rate of the array
+            channels (int): Channels in the array (default 1)
+            input_format (str): Sample format of the array, one of SAMPLE_FORMATS (default "s16le")
+            gain (float): Volume multiplier (default 1.0)
+            priority (int): Ducks sources with a lower priority while playing (default 0)
+            preempt (bool): Stop sources with a lower priority (default False)
+
+        Returns:
+            MixerSource: The playing source
+        """
+        source = MixerSource(self, gain, priority)
+        source.push(AlawEncoder(rate, channels, input_format).convert(array))
+        source.close()
+        return self._add(source, preempt)
+
+    def play_file(self, file, gain=1.0, priority=0, preempt=False, input_format=None):
+        """Play an audio file, decoded by ffmpeg or taken from the cache.
+
+        Args:
+            file (str): Path of the audio file
+            gain (float): Volume multiplier (default 1.0)
+            priority (int): Ducks sources with a lower priority while playing (default 0)
+            preempt (bool): Stop sources with a lower priority (default False)
+            input_format (str, optional): Force the input format instead of letting ffmpeg detect it
+
+        Returns:
+            MixerSource: The playing source
+        """
+        source = MixerSource(self, gain, priority)
+        if self.cache:
+            source.push(alaw_decode(self.cache.get(file)))
+            source.close()
+        else:
+            threading.Thread(target=self._feed, args=(source, decode_file(file, input_format)), daemon=True).start()
+        return self._add(source, preempt)
+
+    def _feed(self, source, chunks):
+        try:
+            for chunk in chunks:
+                if source.done:
+                    break
+                source.push(alaw_decode(chunk), max_queued=1.0)
+        finally:
+            chunks.close()
+            source.close()
+
+    def open_stream(self, rate, channels=1, input_format="s16le", gain=1.0, priority=0, preempt=False):
+        """Open a live source, e.g. for push-to-talk or text to speech.
+
+        Write raw audio to the returned source and close it when done.
+
+        Args:
+            rate (int): Sample rate of the audio written
+            channels (int): Channels of the audio written (default 1)
+            input_format (str): Sample format of the audio written, one of SAMPLE_FORMATS (default "s16le")
+            gain (float): Volume multiplier (default 1.0)
+            priority (int): Ducks sources with a lower priority while open (default 0)
+            preempt (bool): Stop sources with a lower priority (default False)
+
+        Returns:
+            MixerSource: The open source
+        """
+        source = MixerSource(self, gain, priority, AlawEncoder(rate, channels, input_format))
+        return self._add(source, preempt)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                self._lock.wait_for(lambda: self.sources or not self._running)
+                if not self._running:
+                    break
+                self.sources = [source for source in self.sources if not source.done]
+                sources = list(self.sources)
+            if not sources:
+                self.pacer.reset()
+                continue
+
+            frames = np.zeros((len(sources), self.block), dtype=np.float32)
+            for row, source in zip(frames, sources):
+                source._take(row)
+
+            top = max(source.priority for source in sources)
+            gains = np.array([
+                source.gain * (1.0 if source.priority == top else self.duck_gain) for source in sources
+            ], dtype=np.float32)
+            start = np.array([source._applied_gain for source in sources], dtype=np.float32)
+            for source, gain in zip(sources, gains.tolist()):
+                source._applied_gain = gain
+
+            # ramp each source from its previous gain to the new one across the block
+            ramp = np.linspace(0, 1, self.block, dtype=np.float32)
+            weights = start[:, None] + (gains - start)[:, None] * ramp
+            mixed = np.einsum('ij,ij->j', frames, weights)
+            pcm = np.clip(mixed * 32768, -32768, 32767).astype(np.int16)
+
+            self.pacer.wait(self.block / AlawEncoder.RATE)
+            self.sender.send(alaw_encode(pcm))
+
+#: Detected speech, start and end are seconds since the first processed sample
+SpeechSegment = namedtuple('SpeechSegment', ['start', 'end', 'audio'])
+
+class VoiceActivityDetector():
+    """Find speech in a stream of int16 audio chunks.
+
+    Audio is cut into short frames and the energy and zero-crossing rate of
+    all frames in a chunk are computed at once. A frame counts as speech
+    when its energy is ``threshold_db`` above an adaptive noise floor and
+    its zero-crossing rate is below ``max_zcr``, which rejects hiss-like
+    motor noise. Segments include ``preroll_ms`` of audio before the speech
+    started and end after ``hangover_ms`` without speech, or once they reach
+    ``max_segment_ms``.
+
+    The noise floor follows frames that aren't speech. Speech has pauses
+    between words, so if even the quietest frame of the last
+    ``noise_window_ms`` counted as speech the floor also rises towards that
+    minimum. A lasting hum that started above the threshold is then absorbed
+    into the floor instead of holding a segment open forever.
+
+    Args:
+        rate (int): Sample rate of the audio
+        frame_ms (int): Analysis frame length in milliseconds (default 20)
+        threshold_db (float): Level above the noise floor that counts as speech (default 10)
+        min_db (float): Frames quieter than this (dB full scale) are never speech (default -55)
+        max_zcr (float): Highest zero-crossing rate per sample that counts as speech (default 0.35)
+        hangover_ms (int): Silence that ends a segment in milliseconds (default 300)
+        preroll_ms (int): Audio kept from before the speech started in milliseconds (default 200)
+        min_speech_ms (int): Segments with less speech than this are discarded (default 100)
+        noise_rise (float): How quickly the noise floor follows louder noise (default 0.01)
+        noise_fall (float): How quickly the noise floor follows quieter noise (default 0.2)
+        noise_window_ms (int): Window of the minimum level tracked during speech in milliseconds (default 1500)
+        max_segment_ms (int): Longest segment in milliseconds, longer speech is split (default 30000)
+    """
+
+    def __init__(self, rate, frame_ms=20, threshold_db=10, min_db=-55, max_zcr=0.35,
+                 hangover_ms=300, preroll_ms=200, min_speech_ms=100, noise_rise=0.01, noise_fall=0.2,
+                 noise_window_ms=1500, max_segment_ms=30000):
+        self.rate = rate
+        self.frame_len = max(1, rate * frame_ms // 1000)
+        self.threshold_db = threshold_db
+        self.min_db = min_db
+        self.max_zcr = max_zcr
+        self.hangover = max(1, hangover_ms // frame_ms)
+        self.min_speech = max(1, min_speech_ms // frame_ms)
+        self.noise_rise = noise_rise
+        self.noise_fall = noise_fall
+        self.max_segment = max(1, max_segment_ms // frame_ms)
+        #: float: Current noise floor estimate in dB full scale
+        self.noise_floor = None
+        self._preroll = deque(maxlen=max(0, preroll_ms // frame_ms))
+        self._levels = deque(maxlen=max(1, noise_window_ms // frame_ms))
+        self._carry = np.zeros(0, dtype=np.int16)
+        self._samples = 0
+        self._segment = None
+        self._segment_start = 0
+        self._speech_frames = 0
+        self._silent_frames = 0
+
+    def features(self, frames):
+        """Compute energy and zero-crossing rate for a block of frames.
+
+        Args:
+            frames (numpy.ndarray): N x frame_len int16 samples
+
+        Returns:
+            tuple: Energy in dB full scale and zero-crossing rate per sample, one value per frame
+        """
+        samples = frames.astype(np.float32) / 32768
+        energy = 10 * np.log10(np.mean(samples * samples, axis=1) + 1e-10)
+        signs = np.signbit(samples)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_len - 1 or 1)
+        return energy, zcr
+
+    def process(self, chunk):
+        """Feed a chunk of audio and return the segments it completed.
+
+        Args:
+            chunk (numpy.ndarray): int16 samples, may be a view that is reused afterwards
+
+        Returns:
+            list: SpeechSegment tuples that ended within this chunk
+        """
+        audio = np.concatenate((self._carry, chunk))
+        count = len(audio) // self.frame_len
+        self._carry = audio[count * self.frame_len:]
+        if not count:
+            return []
+
+        frames = audio[:count * self.frame_len].reshape(count, self.frame_len)
+        energy, zcr = self.features(frames)
+        if self.noise_floor is None:
+            self.noise_floor = float(energy[0])
+
+        finished = []
+        for frame, level, crossings in zip(frames, energy.tolist(), zcr.tolist()):
+            speech = (level > self.noise_floor + self.threshold_db and level > self.min_db
+                      and crossings < self.max_zcr)
+
+            self._levels.append(level)
+            if not speech:
+                rate = self.noise_fall if level < self.noise_floor else self.noise_rise
+                self.noise_floor += (level - self.noise_floor) * rate
+            elif len(self._levels) == self._levels.maxlen:
+                quietest = min(self._levels)
+                if quietest > self.noise_floor:
+                    self.noise_floor += (quietest - self.noise_floor) * self.noise_rise
+
+            if self._segment is None:
+                if speech:
+                    self._segment = list(self._preroll)
+                    self._segment_start = self._samples - len(self._preroll) * self.frame_len
+                    self._segment.append(frame)
+                    self._speech_frames = 1
+                    self._silent_frames = 0
+                else:
+                    self._preroll.append(frame)
+            else:
+                self._segment.append(frame)
+                if speech:
+                    self._speech_frames += 1
+                    self._silent_frames = 0
+                else:
+                    self._silent_frames += 1
+                if self._silent_frames >= self.hangover or len(self._segment) >= self.max_segment:
+                    segment = self._finish()
+                    if segment:
+                        finished.append(segment)
+            self._samples += self.frame_len
+        return finished
+
+    def _finish(self):
+        frames, self._segment = self._segment, None
+        self._preroll.clear()
+        if self._speech_frames < self.min_speech:
+            return None
+        audio = np.concatenate(frames)
+        start = self._segment_start / self.rate
+        return SpeechSegment(start, start + len(audio) / self.rate, audio)
+
+    def flush(self):
+        """Return the segment in progress, if any, as if the audio ended here.
+
+        Returns:
+            SpeechSegment: The unfinished segment or None
+        """
+        if self._segment is None:
+            return None
+        return self._finish()
+
+    def segments(self, chunks):
+        """Generator that turns a stream of audio chunks into speech segments.
+
+        Args:
+            chunks (iterable): int16 audio chunks, e.g. Robot.Microphone.read()
+
+        Yields:
+            SpeechSegment: Detected speech with its timestamps
+        """
+        for chunk in chunks:
+            yield from self.process(chunk)
+        segment = self.flush()
+        if segment:
+            yield segment
+
+class AudioBus():
+    """Share one microphone capture between many consumers.
+
+    A background thread copies everything the microphone captures into a
+    ring covering the last ``seconds`` of audio. Subscribers read from the
+    ring independently, each at its own pace, and can start from the
+    newest audio or from up to ``seconds`` in the past. A subscriber that
+    falls more than ``seconds`` behind skips ahead and counts the lost
+    samples in its ``overruns``.
+
+    Args:
+        microphone (Robot.Microphone): Microphone to capture from, opened by start and closed by stop
+        seconds (float): Audio kept for late subscribers and slow readers (default 10.0)
+    """
+
+    def __init__(self, microphone, seconds=10.0):
+        self.microphone = microphone
+        self.rate = microphone.rate
+        self.capacity = int(seconds * self.rate)
+        self._ring = np.zeros(self.capacity, dtype=np.int16)
+        #: int: Total samples captured since start
+        self.position = 0
+        # (end position, time.time()) of recently captured chunks, for timestamps
+        self._anchors = deque(maxlen=1024)
+        self._closed = True
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        """Open the microphone and start capturing."""
+        self.microphone.open()
+        with self._cond:
+            self._closed = False
+        self._thread = threading.Thread(target=self._capture, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Close the microphone and wake up all subscribers."""
+        self.microphone.close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _capture(self):
+        for chunk in self.microphone.read():
+            # only the newest capacity samples of an oversized chunk fit
+            chunk = chunk[-self.capacity:]
+            start = self.position % self.capacity
+            first = min(len(chunk), self.capacity - start)
+            self._ring[start:start + first] = chunk[:first]
+            self._ring[:len(chunk) - first] = chunk[first:]
+            with self._cond:
+                self.position += len(chunk)
+                self._anchors.append((self.position, time.time()))
+                self._cond.notify_all()
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def timestamp(self, position):
+        """Estimate when a sample was captured.
+
+        Args:
+            position (int): Sample position on the bus
+
+        Returns:
+            float: time.time() of the sample, or None before anything was captured
+        """
+        with self._cond:
+            anchors = list(self._anchors)
+        if not anchors:
+            return None
+        # the first chunk ending after the sample contains it
+        index = min(bisect.bisect_right([end for end, _ in anchors], position), len(anchors) - 1)
+        end, captured = anchors[index]
+        return captured - (end - position) / self.rate
+
+    def subscribe(self, lookback=0.0):
+        """Attach a new reader to the bus.
+
+        Args:
+            lookback (float): Start this many seconds in the past, limited to the audio kept (default 0.0)
+
+        Returns:
+            AudioSubscriber: Reader starting at the requested point
+        """
+        with self._cond:
+            back = min(int(lookback * self.rate), self.capacity, self.position)
+            return AudioSubscriber(self, self.position - back)
+
+    def latest(self, seconds):
+        """Copy the most recent audio.
+
+        Args:
+            seconds (float): Length to copy, limited to the audio kept
+
+        Returns:
+            numpy.ndarray: int16 samples
+        """
+        with self._cond:
+            end = self.position
+        count = min(int(seconds * self.rate), self.capacity, end)
+        return self._copy(end - count, end)
+
+    def _copy(self, start, end):
+        out = np.empty(end - start, dtype=np.int16)
+        first = start % self.capacity
+        split = min(len(out), self.capacity - first)
+        out[:split] = self._ring[first:first + split]
+        out[split:] = self._ring[:len(out) - split]
+        return out
+
+class AudioSubscriber():
+    """Independent reader of an AudioBus, created by AudioBus.subscribe.
+
+    Iterating over a subscriber yields audio chunks until the bus stops, so
+    it can be passed anywhere Robot.Microphone.read() is accepted, e.g.
+    VoiceActivityDetector.segments.
+
+    Args:
+        bus (AudioBus): Bus to read from
+        position (int): Sample position to start reading at
+    """
+
+    def __init__(self, bus, position):
+        self.bus = bus
+        #: int: Position of the next sample to read
+        self.position = position
+        #: int: Samples lost because this subscriber fell behind
+        self.overruns = 0
+
+    @property
+    def available(self):
+        """int: Samples waiting to be read"""
+        return self.bus.position - self.position
+
+    def read(self, max_samples=None, timeout=None):
+        """Read the audio captured since the last read.
+
+        Args:
+            max_samples (int, optional): Most samples to return
+            timeout (float, optional): Seconds to wait for audio
+
+        Returns:
+            tuple: time.time() of the first sample and a copy of the int16 samples,
+            or None when the bus stopped or the timeout expired
+        """
+        bus = self.bus
+        with bus._cond:
+            bus._cond.wait_for(lambda: bus.position > self.position or bus._closed, timeout)
+            end = bus.position
+        if end <= self.position:
+            return None
+
+        oldest = end - bus.capacity
+        if self.position < oldest:
+            self.overruns += oldest - self.position
+            self.position = oldest
+        if max_samples is not None:
+            end = min(end, self.position + max_samples)
+
+        timestamp = bus.timestamp(self.position)
+        audio = bus._copy(self.position, end)
+        # the writer may have lapped us while copying
+        oldest = bus.position - bus.capacity
+        if self.position < oldest:
+            skipped = min(oldest - self.position, len(audio))
+            self.overruns += skipped
+            audio = audio[skipped:]
+            timestamp += skipped / bus.rate
+        self.position = end
+        return timestamp, audio
+
+    def __iter__(self):
+        """Generator that yields audio until the bus stops.
+
+        Yields:
+            numpy.ndarray: Copies of int16 samples
+        """
+        while True:
+            result = self.read()
+            if result is None:
+                break
+            yield result[1]
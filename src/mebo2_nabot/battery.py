@@ -0,0 +1,86 @@
+import math
+from .clock import Clock
+
+class BatteryEstimator():
+    """Estimate battery charge from raw BAT=? samples.
+
+    The raw value behaves like a voltage that sags while the motors are
+    driven, so each sample is compensated for the load implied by the latest
+    commanded wheel speeds and then smoothed with a one-dimensional Kalman filter.
+
+    Args:
+        sample_interval (float): Seconds between battery samples (default 5.0)
+        load_sag (float): Raw value drop at full wheel speed (default 70)
+        process_noise (float): Expected variance of the true value per second (default 0.05)
+        measurement_noise (float): Variance of a single compensated sample (default 100)
+        clock (Clock, optional): Clock used to time samples (default real time)
+    """
+
+    # 415 seemed to be the lowest value before poweroff
+    # max value at idle on full battery was about 800
+    # max value at full speed on full battery was about 730, which gives the default load_sag
+    EMPTY = 415
+    FULL = 800
+
+    def __init__(self, sample_interval=5.0, load_sag=70, process_noise=0.05, measurement_noise=100, clock=None):
+        self.sample_interval = sample_interval
+        self.load_sag = load_sag
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.clock = clock or Clock()
+        self.load = 0.0
+        self.raw = None
+        self.estimate = None
+        self.variance = None
+        self.last_sample = -math.inf
+
+    def update_load(self, wheel_left, wheel_right):
+        """Set the motor load from commanded wheel speeds.
+
+        Args:
+            wheel_left (float): Left wheel speed (-100 to 100)
+            wheel_right (float): Right wheel speed (-100 to 100)
+        """
+        self.load = min(1.0, (abs(wheel_left) + abs(wheel_right)) / 200)
+
+    def add_sample(self, raw):
+        """Feed a raw BAT=? value into the filter.
+
+        Args:
+            raw (int): Raw battery value
+        """
+        now = self.clock.monotonic()
+        compensated = raw + self.load_sag * self.load
+        if self.estimate is None:
+            self.estimate = compensated
+            self.variance = self.measurement_noise
+        else:
+            self.variance += self.process_noise * (now - self.last_sample)
+            gain = self.variance / (self.variance + self.measurement_noise)
+            self.estimate += gain * (compensated - self.estimate)
+            self.variance *= 1 - gain
+        self.raw = raw
+        self.last_sample = now
+
+    def due(self):
+        """Return True when a new sample should be taken.
+
+        Returns:
+            bool: Whether sample_interval has passed since the last sample
+        """
+        return self.clock.monotonic() - self.last_sample >= self.sample_interval
+
+    def fresh(self):
+        """Return True when the estimate is recent enough to use without a new query.
+
+        Returns:
+            bool: Whether a sample arrived within two sample intervals
+        """
+        return self.clock.monotonic() - self.last_sample < 2 * self.sample_interval
+
+    @property
+    def percent(self):
+        """int: Estimated charge percentage, or -1 before the first sample"""
+        if self.estimate is None:
+            return -1
+        return max(0, min(100, round((self.estimate - self.EMPTY) / (self.FULL - self.EMPTY) * 100)))
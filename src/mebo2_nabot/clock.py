@@ -0,0 +1,75 @@
+import threading
+import time
+
+class Clock():
+    """Real time, used by default wherever the package waits or reads the time.
+
+    Code that sleeps or timestamps takes a clock instead of calling the
+    ``time`` module, so a VirtualClock can be swapped in for tests.
+    """
+
+    def monotonic(self):
+        """Return seconds from a monotonic clock.
+
+        Returns:
+            float: time.monotonic()
+        """
+        return time.monotonic()
+
+    def time(self):
+        """Return wall clock seconds since the epoch.
+
+        Returns:
+            float: time.time()
+        """
+        return time.time()
+
+    def sleep(self, seconds):
+        """Wait for some time.
+
+        Args:
+            seconds (float): Time to wait, nothing happens if it is not positive
+        """
+        if seconds > 0:
+            time.sleep(seconds)
+
+class VirtualClock(Clock):
+    """Clock that only moves when it is slept on or advanced.
+
+    Sleeping returns immediately after moving the clock forward, so code
+    that would wait for seconds runs in microseconds while seeing exactly
+    the times it would have seen in real time. Meant for single threaded
+    tests together with a FakeTransport.
+
+    Args:
+        start (float): Initial monotonic time (default 0.0)
+        epoch (float): Wall clock time at the initial monotonic time (default 1700000000.0)
+    """
+
+    def __init__(self, start=0.0, epoch=1700000000.0):
+        self.now = start
+        self.epoch = epoch - start
+        #: float: Total seconds slept
+        self.slept = 0.0
+        self._lock = threading.Lock()
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.epoch + self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            with self._lock:
+                self.now += seconds
+                self.slept += seconds
+
+    def advance(self, seconds):
+        """Move the clock forward without counting it as sleep.
+
+        Args:
+            seconds (float): Time to move forward
+        """
+        with self._lock:
+            self.now += seconds
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from .robot import Robot
+
+#: A decoded robot event, value is None for events without one
+Event = namedtuple('Event', ['name', 'value', 'time'])
+
+class EventListener():
+    """Poll the robot's event channel in a background thread and deliver decoded events.
+
+    The poll interval drops to ``min_interval`` after an event and backs off
+    towards ``max_interval`` while the robot is quiet. Events go to registered
+    callbacks (called from the listener thread), to ``events()`` iterators and
+    to ``async for`` loops. Iterators get bounded queues, when a consumer
+    falls behind its oldest events are dropped and counted in ``dropped``.
+
+    Args:
+        robot (Robot): Robot to listen to
+        min_interval (float): Shortest time between polls in seconds (default 0.05)
+        max_interval (float): Longest time between polls in seconds (default 1.0)
+        queue_size (int): Events buffered per iterator (default 64)
+    """
+
+    def __init__(self, robot, min_interval=0.05, max_interval=1.0, queue_size=64):
+        self.robot = robot
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.queue_size = queue_size
+        self.interval = min_interval
+        self.dropped = 0
+        self.logger = logging.getLogger('Robot Events')
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Register a callback for every event.
+
+        Args:
+            callback (callable): Called with each Event from the listener thread
+
+        Returns:
+            callable: The callback, so this can be used as a decorator
+        """
+        with self._lock:
+            self._callbacks = self._callbacks + [callback]
+        return callback
+
+    def unsubscribe(self, callback):
+        """Remove a registered callback.
+
+        Args:
+            callback (callable): Callback passed to subscribe
+        """
+        with self._lock:
+            self._callbacks = [cb for cb in self._callbacks if cb is not callback]
+
+    def start(self):
+        """Start the listener thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the listener thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            json = self.robot._send_single_cmd(Robot.Command.QUERY_EVENT)
+            events = self.decode(json) if json else []
+
+            for event in events:
+                for callback in self._callbacks:
+                    try:
+                        callback(event)
+                    except Exception as e:
+                        self.logger.warning(f"Event callback failed: {e}")
+
+            if events:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * 1.5)
+            self._stop.wait(self.interval)
+
+    @staticmethod
+    def decode(json):
+        """Decode an event query response.
+
+        Args:
+            json (dict): Parsed QUERY_EVENT response
+
+        Returns:
+            list: Events in the response, empty if there were none
+        """
+        text = str(json.get('response') or "").strip()
+        if not text or text in ("*", "NONE"):
+            return []
+
+        name, sep, value = text.partition("=")
+        if not sep:
+            value = None
+        elif value.lstrip('-').isdigit():
+            value = int(value)
+        return [Event(name, value, time.time())]
+
+    def _put(self, q, event):
+        """Put an event in a bounded queue, dropping the oldest one if it is full."""
+        while True:
+            try:
+                q.put_nowait(event)
+                return
+            except (queue.Full, asyncio.QueueFull):
+                try:
+                    q.get_nowait()
+                    self.dropped += 1
+                except (queue.Empty, asyncio.QueueEmpty):
+                    pass
+
+    def events(self, timeout=None):
+        """Generator that yields events as they arrive.
+
+        Args:
+            timeout (float, optional): Stop after this many seconds without an event
+
+        Yields:
+            Event: Decoded events
+        """
+        q = queue.Queue(self.queue_size)
+        deliver = self.subscribe(lambda event: self._put(q, event))
+        try:
+            while True:
+                try:
+                    yield q.get(timeout=timeout)
+                except queue.Empty:
+                    return
+        finally:
+            self.unsubscribe(deliver)
+
+    async def aevents(self):
+        """Async generator that yields events as they arrive.
+
+        Yields:
+            Event: Decoded events
+        """
+        loop = asyncio.get_running_loop()
+        q = asyncio.Queue(self.queue_size)
+        deliver = self.subscribe(lambda event: loop.call_soon_threadsafe(self._put, q, event))
+        try:
+            while True:
+                yield await q.get()
+        finally:
+            self.unsubscribe(deliver)
+
+    def __aiter__(self):
+        return self.aevents()
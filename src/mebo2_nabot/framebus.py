@@ -0,0 +1,270 @@
+import logging
+import os
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+_MAGIC = 0x4d45424f46524d32  # "MEBOFRM2"
+
+# header fields, stored as int64 at the start of the segment
+_MAGIC_FIELD, _HEIGHT, _WIDTH, _CHANNELS, _SLOTS, _WRITE_SEQ, _PID = range(7)
+_HEADER_FIELDS = 7
+
+def _layout(shape, slots):
+    """Return byte offsets of the slot sequence numbers, timestamps and frames, and the total size."""
+    seq_offset = _HEADER_FIELDS * 8
+    time_offset = seq_offset + slots * 8
+    frame_offset = time_offset + slots * 8
+    return seq_offset, time_offset, frame_offset, frame_offset + slots * int(np.prod(shape))
+
+def _views(buf, shape, slots):
+    seq_offset, time_offset, frame_offset, _ = _layout(shape, slots)
+    header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=buf)
+    seqs = np.ndarray((slots,), dtype=np.int64, buffer=buf, offset=seq_offset)
+    times = np.ndarray((slots,), dtype=np.float64, buffer=buf, offset=time_offset)
+    frames = np.ndarray((slots,) + tuple(shape), dtype=np.uint8, buffer=buf, offset=frame_offset)
+    return header, seqs, times, frames
+
+def _alive(pid):
+    """Return True unless the process with this PID has certainly exited."""
+    if os.name != 'posix' or pid == os.getpid():
+        # segments outside POSIX disappear with their last handle, so one that exists has a live owner
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # exists, but belongs to another user
+        pass
+    return True
+
+class FrameBroker():
+    """Share frames from one camera with any number of processes.
+
+    The broker owns a single capture and copies every decoded frame into a
+    ring of slots in ``multiprocessing.shared_memory``. Each slot carries the
+    sequence number of the frame it holds, so FrameSubscriber instances in
+    other processes can read without locks and the broker never waits for them.
+
+    Args:
+        camera (Robot.Camera): Camera to publish, opened by start
+        name (str): Name of the shared memory segment (default "mebo2_frames")
+        slots (int): Number of frames kept in the ring (default 4)
+    """
+
+    def __init__(self, camera, name="mebo2_frames", slots=4):
+        self.camera = camera
+        self.name = name
+        self.slots = slots
+        self.logger = logging.getLogger('Frame Broker')
+        self.shm = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Open the camera, create the shared memory ring and start publishing."""
+        self.camera.open()
+        frame, timestamp, _ = self.camera.read_latest()
+        if frame is None:
+            self.camera.close()
+            raise RuntimeError("Couldn't read a frame from the camera")
+        if frame.ndim == 2:
+            frame = frame[:, :, None]
+
+        shape = frame.shape
+        size = _layout(shape, self.slots)[3]
+        try:
+            self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:
+            self._remove_stale()
+            self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        self._header, self._seqs, self._times, self._frames = _views(self.shm.buf, shape, self.slots)
+        self._header[:] = (_MAGIC,) + tuple(shape) + (self.slots, 0, os.getpid())
+        self._seqs[:] = 0
+        self.publish(frame, timestamp)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _remove_stale(self):
+        """Unlink a segment left behind by a broker whose process has exited.
+
+        Raises:
+            FileExistsError: If the segment isn't a frame ring or the broker that created it is still running
+        """
+        stale = shared_memory.SharedMemory(name=self.name)
+        removed = False
+        try:
+            if stale.size < _HEADER_FIELDS * 8:
+                raise FileExistsError(f"Shared memory {self.name} exists and isn't a frame ring")
+            header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=stale.buf)
+            magic, pid = int(header[_MAGIC_FIELD]), int(header[_PID])
+            del header
+            if magic != _MAGIC:
+                raise FileExistsError(f"Shared memory {self.name} exists and isn't a frame ring")
+            if _alive(pid):
+                raise FileExistsError(f"Broker process {pid} is still publishing to {self.name}")
+            self.logger.warning(f"Removing stale shared memory {self.name}")
+            stale.unlink()
+            removed = True
+        finally:
+            if not removed:
+                # attaching registered the segment with the resource tracker, which
+                # would unlink it when this process exits
+                try:
+                    from multiprocessing import resource_tracker
+                    resource_tracker.unregister(stale._name, 'shared_memory')
+                except Exception:
+                    pass
+            stale.close()
+
+    def _run(self):
+        while self._running:
+            frame, timestamp, _ = self.camera.read_latest(timeout=1.0)
+            if frame is not None:
+                self.publish(frame, timestamp)
+
+    def publish(self, frame, timestamp=None):
+        """Copy a frame into the next slot of the ring.
+
+        Args:
+            frame (numpy.ndarray): Frame with the shape of the first published frame
+            timestamp (float, optional): Capture time, defaults to now
+        """
+        seq = int(self._header[_WRITE_SEQ]) + 1
+        slot = seq % self.slots
+        # mark the slot as being written so readers skip it
+        self._seqs[slot] = -1
+        np.copyto(self._frames[slot], frame.reshape(self._frames.shape[1:]))
+        self._times[slot] = time.time() if timestamp is None else timestamp
+        self._seqs[slot] = seq
+        self._header[_WRITE_SEQ] = seq
+
+    def stop(self):
+        """Stop publishing, close the camera and remove the shared memory segment."""
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.camera.close()
+        if self.shm:
+            del self._header, self._seqs, self._times, self._frames
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+class FrameSubscriber():
+    """Read frames published by a FrameBroker, possibly in another process.
+
+    Frames are returned as views into shared memory. A view stays valid
+    until the broker has published ``slots - 1`` newer frames, which can be
+    checked with ``is_valid``. Pass ``copy=True`` to get a private copy instead.
+
+    Args:
+        name (str): Name of the broker's shared memory segment (default "mebo2_frames")
+
+    Raises:
+        FileNotFoundError: If no broker with that name is running
+    """
+
+    def __init__(self, name="mebo2_frames"):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # before Python 3.13 attaching registers the segment with the resource tracker,
+            # which would unlink the broker's segment when this process exits
+            self.shm = shared_memory.SharedMemory(name=name)
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, 'shared_memory')
+            except Exception:
+                pass
+
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+        if header[_MAGIC_FIELD] != _MAGIC:
+            self.shm.close()
+            raise ValueError(f"{name} is not a frame broker segment")
+        shape = tuple(int(v) for v in header[_HEIGHT:_CHANNELS + 1])
+        self.slots = int(header[_SLOTS])
+        self._header, self._seqs, self._times, self._frames = _views(self.shm.buf, shape, self.slots)
+        self.last_seq = 0
+        self.skipped = 0
+
+    def _read(self, seq, copy):
+        slot = seq % self.slots
+        frame = self._frames[slot]
+        if copy:
+            frame = frame.copy()
+        timestamp = float(self._times[slot])
+        if self._seqs[slot] != seq:
+            # overwritten while reading
+            return None
+        self.last_seq = seq
+        return frame, timestamp, seq
+
+    def read_latest(self, copy=False):
+        """Return the newest published frame.
+
+        Args:
+            copy (bool, optional): Return a private copy instead of a view (default False)
+
+        Returns:
+            tuple: Frame, capture time and sequence number, or (None, None, None) if nothing was published
+        """
+        while True:
+            seq = int(self._header[_WRITE_SEQ])
+            if seq == 0:
+                return None, None, None
+            result = self._read(seq, copy)
+            if result:
+                return result
+
+    def read_next(self, timeout=None, copy=False, poll=0.001):
+        """Return the frame after the last one read, waiting for it if needed.
+
+        If the broker has already overwritten that frame, the oldest frame
+        still in the ring is returned and the gap is added to ``skipped``.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a new frame
+            copy (bool, optional): Return a private copy instead of a view (default False)
+            poll (float, optional): Seconds between checks for a new frame (default 0.001)
+
+        Returns:
+            tuple: Frame, capture time and sequence number, or (None, None, None) on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            latest = int(self._header[_WRITE_SEQ])
+            if latest > self.last_seq:
+                seq = self.last_seq + 1
+                oldest = latest - self.slots + 2
+                if seq < oldest:
+                    self.skipped += oldest - seq
+                    seq = oldest
+                result = self._read(seq, copy)
+                if result:
+                    return result
+                continue
+            if deadline is not None and time.monotonic() >= deadline:
+                return None, None, None
+            time.sleep(poll)
+
+    def is_valid(self, seq):
+        """Return True while the frame with this sequence number is still in its slot.
+
+        Args:
+            seq (int): Sequence number returned with the frame
+
+        Returns:
+            bool: Whether a view of that frame still holds it
+        """
+        return int(self._seqs[seq % self.slots]) == seq
+
+    def close(self):
+        """Detach from the shared memory segment."""
+        del self._header, self._seqs, self._times, self._frames
+        self.shm.close()
@@ -0,0 +1,217 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+class _StageQueue():
+    """Bounded queue that drops or blocks when full, depending on the policy."""
+
+    def __init__(self, size, policy):
+        self.size = 1 if policy == "latest" else size
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            if self.policy == "block":
+                self._cond.wait_for(lambda: len(self._items) < self.size or self.closed)
+            elif len(self._items) >= self.size:
+                self._items.popleft()
+                self.dropped += 1
+            if self.closed:
+                return
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def get(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self.closed)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+class Stage():
+    """A step of a Pipeline.
+
+    Args:
+        fn (callable): Called with each item, returns the item for the next stage or None to drop it
+        name (str, optional): Name used in stats, defaults to the function name
+        workers (int): Number of items processed in parallel (default 1)
+        processes (bool): Run fn in a process pool instead of threads, fn and items must be picklable (default False)
+        queue_size (int): Items waiting for this stage (default 2)
+        policy (str): What to do when the queue is full, "latest" keeps only the newest item,
+            "drop_oldest" discards the oldest and "block" waits (default "latest")
+    """
+
+    POLICIES = ("latest", "drop_oldest", "block")
+
+    def __init__(self, fn, name=None, workers=1, processes=False, queue_size=2, policy="latest"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.fn = fn
+        self.name = name or getattr(fn, '__name__', 'stage')
+        self.workers = workers
+        self.processes = processes
+        self.queue_size = queue_size
+        self.policy = policy
+        self.processed = 0
+        self.reordered = 0
+        #: float: Average seconds spent in fn per item
+        self.latency = 0.0
+        #: float: Items completed per second
+        self.fps = 0.0
+        self._last_seq = -1
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._finished = 0
+
+class Pipeline():
+    """Run a source and a chain of stages concurrently.
+
+    Every stage has its own workers and a bounded input queue, so a slow
+    stage drops work according to its policy instead of holding up the
+    ones before it. Throughput is set by the slowest stage rather than the
+    sum of all of them, and end-to-end latency stays bounded by the queue sizes.
+
+    Args:
+        source (callable): Called repeatedly to produce items (e.g. camera.read), returning None ends the pipeline
+        stages (list): Stage instances, or plain callables for single-threaded "latest" stages
+    """
+
+    def __init__(self, source, stages):
+        self.source = source
+        self.stages = [stage if isinstance(stage, Stage) else Stage(stage) for stage in stages]
+        self.logger = logging.getLogger('Pipeline')
+        self.produced = 0
+        #: float: Average seconds from an item leaving the source to leaving the last stage
+        self.latency = 0.0
+        self._queues = []
+        self._pools = []
+        self._threads = []
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self):
+        """Start the source and stage threads."""
+        self._running = True
+        self._queues = [_StageQueue(stage.queue_size, stage.policy) for stage in self.stages]
+        for stage in self.stages:
+            stage._last_seq = -1
+            stage._finished = 0
+        self._threads = [threading.Thread(target=self._run_source, daemon=True)]
+        for i, stage in enumerate(self.stages):
+            pool = ProcessPoolExecutor(stage.workers) if stage.processes else None
+            self._pools.append(pool)
+            for _ in range(stage.workers):
+                self._threads.append(threading.Thread(target=self._run_stage, args=(i, pool), daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Stop all threads and process pools."""
+        self._running = False
+        for q in self._queues:
+            q.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        for pool in self._pools:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+        self._threads = []
+        self._pools = []
+
+    def wait(self):
+        """Block until the source runs out of items and the pipeline stops."""
+        for thread in list(self._threads):
+            thread.join()
+
+    def _run_source(self):
+        seq = 0
+        while self._running:
+            item = self.source()
+            if item is None:
+                break
+            self._queues[0].put((seq, time.monotonic(), item))
+            seq += 1
+            self.produced = seq
+        self._queues[0].close()
+
+    def _run_stage(self, index, pool):
+        stage = self.stages[index]
+        q = self._queues[index]
+        next_q = self._queues[index + 1] if index + 1 < len(self._queues) else None
+
+        while True:
+            envelope = q.get()
+            if envelope is None:
+                break
+            seq, created, item = envelope
+
+            start = time.monotonic()
+            try:
+                result = pool.submit(stage.fn, item).result() if pool else stage.fn(item)
+            except Exception as e:
+                self.logger.warning(f"Stage {stage.name} failed: {e}")
+                continue
+            done = time.monotonic()
+
+            with self._lock:
+                stage.processed += 1
+                stage.latency += 0.1 * ((done - start) - stage.latency)
+                stage._window_count += 1
+                if done - stage._window_start >= 1.0:
+                    stage.fps = stage._window_count / (done - stage._window_start)
+                    stage._window_start = done
+                    stage._window_count = 0
+
+                # with several workers an older item can finish after a newer one
+                if seq < stage._last_seq:
+                    stage.reordered += 1
+                    continue
+                stage._last_seq = seq
+
+                if next_q is None:
+                    self.latency += 0.1 * ((done - created) - self.latency)
+
+            if result is not None and next_q is not None:
+                next_q.put((seq, created, result))
+
+        # the last worker of a stage to finish closes the next queue
+        with self._lock:
+            stage._finished += 1
+            finished = stage._finished == stage.workers
+        if finished and next_q is not None:
+            next_q.close()
+
+    def stats(self):
+        """Return per-stage statistics.
+
+        Returns:
+            dict: Stage name to processed, dropped, reordered, latency (seconds) and fps,
+            plus "pipeline" with items produced and end-to-end latency
+        """
+        with self._lock:
+            result = {
+                stage.name: {
+                    'processed': stage.processed,
+                    'dropped': q.dropped,
+                    'reordered': stage.reordered,
+                    'latency': stage.latency,
+                    'fps': stage.fps
+                }
+                for stage, q in zip(self.stages, self._queues)
+            }
+            result['pipeline'] = {'produced': self.produced, 'latency': self.latency}
+        return result
@@ -0,0 +1,170 @@
+import math
+import threading
+import numpy as np
+from .clock import Clock
+from .robot import Robot
+
+#: Commands in the order used for the ``command`` field of a record
+COMMANDS = list(Robot.Command)
+
+#: Layout of a single record in a command log
+RECORD_DTYPE = np.dtype([
+    ('time', '<f8'),     # seconds since the first recorded command
+    ('batch', '<u4'),    # request number, shared by commands sent together
+    ('command', 'u1'),   # index into COMMANDS
+    ('value', '<f4'),    # NaN when the command was sent without a numeric value
+    ('latency', '<f4')   # seconds until the robot answered the request
+])
+
+class CommandRecorder():
+    """Record every command sent to the robot into a compact binary log.
+
+    Records are kept in a preallocated NumPy array that doubles when full,
+    so recording costs one row assignment per command.
+
+    Args:
+        capacity (int): Number of records to preallocate (default 4096)
+    """
+
+    def __init__(self, capacity=4096):
+        self._records = np.zeros(capacity, dtype=RECORD_DTYPE)
+        self._count = 0
+        self._batch = 0
+        self._start = None
+        self._lock = threading.Lock()
+        self._index = {cmd: i for i, cmd in enumerate(COMMANDS)}
+
+    def attach(self, robot):
+        """Start recording commands sent by a robot.
+
+        Args:
+            robot (Robot): Robot to record
+
+        Returns:
+            CommandRecorder: This recorder
+        """
+        robot.recorder = self
+        return self
+
+    def detach(self, robot):
+        """Stop recording commands sent by a robot.
+
+        Args:
+            robot (Robot): Robot to stop recording
+        """
+        if robot.recorder is self:
+            robot.recorder = None
+
+    def record(self, commands, start, latency):
+        """Append one request to the log. Called by the robot after each request.
+
+        Args:
+            commands (iterable): (Command, value) pairs sent in the request
+            start (float): Robot clock's ``monotonic()`` when the request was sent
+            latency (float): Seconds until the response arrived
+        """
+        with self._lock:
+            if self._start is None:
+                self._start = start
+            t = start - self._start
+            for cmd, value in commands:
+                if self._count == len(self._records):
+                    self._records = np.concatenate((self._records, np.zeros_like(self._records)))
+                self._records[self._count] = (
+                    t, self._batch, self._index[cmd],
+                    value if isinstance(value, (int, float)) else math.nan, latency
+                )
+                self._count += 1
+            self._batch += 1
+
+    @property
+    def records(self):
+        """numpy.ndarray: View of the recorded commands (see RECORD_DTYPE)"""
+        return self._records[:self._count]
+
+    def clear(self):
+        """Discard all recorded commands."""
+        with self._lock:
+            self._count = 0
+            self._batch = 0
+            self._start = None
+
+    def save(self, path):
+        """Write the log to a ``.npy`` file.
+
+        Args:
+            path (str): Destination file
+        """
+        with self._lock:
+            np.save(path, self.records)
+
+class CommandReplayer():
+    """Re-send a recorded command log with its original timing.
+
+    Args:
+        records (numpy.ndarray): Records in RECORD_DTYPE layout
+    """
+
+    def __init__(self, records):
+        if records.dtype != RECORD_DTYPE:
+            raise ValueError("Records are not a command log")
+        self.records = records
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a log written by CommandRecorder.save.
+
+        Args:
+            path (str): Path of the ``.npy`` log
+
+        Returns:
+            CommandReplayer: Replayer for the log
+        """
+        return cls(np.load(path))
+
+    def batches(self):
+        """Generator over the requests in the log.
+
+        Yields:
+            tuple: Request time in seconds and a list of (Command, value) pairs
+        """
+        if not len(self.records):
+            return
+        # indices where a new request starts
+        starts = np.flatnonzero(np.diff(self.records['batch'], prepend=-1))
+        for batch in np.split(self.records, starts[1:]):
+            commands = [
+                (COMMANDS[cmd], None if math.isnan(value) else float(value))
+                for cmd, value in zip(batch['command'].tolist(), batch['value'].tolist())
+            ]
+            yield float(batch['time'][0]), commands
+
+    def replay(self, robot, speed=1.0):
+        """Send the log to a robot (or anything with ``send_commands``).
+
+        Requests are scheduled against absolute deadlines on the robot's
+        clock, so slow responses do not push later requests back and a robot
+        with a VirtualClock replays without waiting. Register writes are not
+        stored with their data and are skipped.
+
+        Args:
+            robot (Robot): Robot or simulator to send the commands to, real time is used if it has no clock
+            speed (float, optional): Playback rate, ``math.inf`` sends as fast as possible (default 1.0)
+
+        Returns:
+            float: Largest delay in seconds between a deadline and its request being sent
+        """
+        if speed <= 0:
+            raise ValueError("Speed must be positive")
+
+        clock = getattr(robot, 'clock', None) or Clock()
+        start = clock.monotonic()
+        max_lateness = 0.0
+        for t, commands in self.batches():
+            deadline = start + t / speed
+            clock.sleep(deadline - clock.monotonic())
+            max_lateness = max(max_lateness, clock.monotonic() - deadline)
+            commands = [(cmd, value) for cmd, value in commands if cmd is not Robot.Command.SET_REG]
+            if commands:
+                robot.send_commands(commands)
+        return max_lateness
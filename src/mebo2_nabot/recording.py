@@ -0,0 +1,251 @@
+import csv
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+#: A recorded segment, start and end are time.time() values
+Segment = namedtuple('Segment', ['path', 'start', 'end'])
+
+class StreamRecorder():
+    """Record the robot's stream into rolling segments without re-encoding.
+
+    ffmpeg copies the video and audio packets from the stream into files of
+    ``segment_time`` seconds. Finished segments are listed in ``index.csv``
+    in the recording directory with their wall clock start and end times,
+    and a background thread deletes segments that fall outside the
+    retention policy. A recorder created on an existing directory can
+    list and export segments without recording.
+
+    Args:
+        directory (str): Directory to write segments and the index to
+        url (str): Stream to record (default "rtsp://192.168.99.1/media/stream2")
+        segment_time (float): Length of each segment in seconds (default 60)
+        format (str): "mkv" or "mp4" (default "mkv")
+        max_age (float, optional): Delete segments that ended more than this many seconds ago
+        max_bytes (int, optional): Delete the oldest segments while the total size exceeds this
+        check_interval (float): Seconds between index updates and retention checks (default 10)
+    """
+
+    FORMATS = {'mkv': 'matroska', 'mp4': 'mp4'}
+
+    def __init__(self, directory, url="rtsp://192.168.99.1/media/stream2", segment_time=60, format="mkv",
+                 max_age=None, max_bytes=None, check_interval=10):
+        if format not in self.FORMATS:
+            raise ValueError(f"Unsupported segment format: {format}")
+
+        self.directory = directory
+        self.url = url
+        self.segment_time = segment_time
+        self.format = format
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.logger = logging.getLogger('Stream Recorder')
+        self.index_path = os.path.join(directory, "index.csv")
+        self.process = None
+        self._session_list = None
+        self._anchor = None
+        self._first_seen = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start recording."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._session_start = time.time()
+        self._session_list = os.path.join(self.directory, f"session-{int(self._session_start)}.csv")
+        self._session_lines = 0
+        # segment times in the list are relative to the first packet, which arrives
+        # only once ffmpeg has connected, so the session is anchored when ffmpeg
+        # creates its first segment rather than now
+        self._anchor = None
+        self._first_seen = None
+        self._existing = set(os.listdir(self.directory))
+
+        ffmpeg_cmd = [
+            'ffmpeg',
+            '-loglevel', 'error'
+        ]
+        if self.url.startswith("rtsp://"):
+            ffmpeg_cmd += ['-rtsp_transport', 'tcp']
+        ffmpeg_cmd += [
+            '-i', self.url,
+            '-map', '0',
+            '-c', 'copy',
+            '-f', 'segment',
+            '-segment_time', str(self.segment_time),
+            '-segment_format', self.FORMATS[self.format],
+            '-reset_timestamps', '1',
+            '-strftime', '1',
+            '-segment_list', self._session_list,
+            '-segment_list_type', 'csv',
+            os.path.join(self.directory, f"%Y%m%d-%H%M%S.{self.format}")
+        ]
+        self.process = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.DEVNULL)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop recording, finishing the current segment."""
+        if self.process:
+            # ffmpeg closes the current segment cleanly on SIGTERM
+            self.process.terminate()
+            self.process.wait()
+            self.process = None
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._update_index()
+        if self._session_list and os.path.exists(self._session_list):
+            os.remove(self._session_list)
+
+    def _run(self):
+        while self._first_seen is None and not self._stop.wait(0.05):
+            if any(name.endswith(f".{self.format}") and name not in self._existing
+                   for name in os.listdir(self.directory)):
+                self._first_seen = time.time()
+        while not self._stop.wait(self.check_interval):
+            self._update_index()
+            self.apply_retention()
+            if self.process and self.process.poll() is not None:
+                self.logger.warning("ffmpeg exited, recording stopped")
+
+    def _update_index(self):
+        """Move segments finished by ffmpeg from the session list to the index."""
+        if not (self._session_list and os.path.exists(self._session_list)):
+            return
+        with open(self._session_list, newline='') as f:
+            rows = list(csv.reader(f))[self._session_lines:]
+        if not rows:
+            return
+
+        with self._lock, open(self.index_path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            for filename, start, end in (row[:3] for row in rows if len(row) >= 3):
+                if self._anchor is None:
+                    self._anchor = self._first_segment_time(filename) - float(start)
+                writer.writerow([
+                    os.path.basename(filename),
+                    f"{self._anchor + float(start):.3f}",
+                    f"{self._anchor + float(end):.3f}"
+                ])
+        self._session_lines += len(rows)
+
+    def _first_segment_time(self, filename):
+        """Return the wall clock time the session's first segment was created."""
+        if self._first_seen is not None:
+            return self._first_seen
+        # not seen while running, fall back to the second-resolution time in its name
+        try:
+            return time.mktime(time.strptime(os.path.splitext(os.path.basename(filename))[0], "%Y%m%d-%H%M%S"))
+        except ValueError:
+            return self._session_start
+
+    def segments(self, start=None, end=None):
+        """List recorded segments, optionally only those overlapping a time range.
+
+        Args:
+            start (float, optional): Range start as a time.time() value
+            end (float, optional): Range end as a time.time() value
+
+        Returns:
+            list: Segment tuples in chronological order
+        """
+        if not os.path.exists(self.index_path):
+            return []
+        with self._lock, open(self.index_path, newline='') as f:
+            segments = [
+                Segment(os.path.join(self.directory, name), float(seg_start), float(seg_end))
+                for name, seg_start, seg_end in csv.reader(f)
+            ]
+        return [
+            segment for segment in segments
+            if (start is None or segment.end > start) and (end is None or segment.start < end)
+        ]
+
+    def apply_retention(self):
+        """Delete segments outside of max_age and max_bytes.
+
+        Returns:
+            list: Deleted segments
+        """
+        segments = self.segments()
+        keep = []
+        deleted = []
+        now = time.time()
+        for segment in segments:
+            if self.max_age is not None and segment.end < now - self.max_age:
+                deleted.append(segment)
+            else:
+                keep.append(segment)
+
+        if self.max_bytes is not None:
+            sizes = [os.path.getsize(s.path) if os.path.exists(s.path) else 0 for s in keep]
+            total = sum(sizes)
+            while keep and total > self.max_bytes:
+                total -= sizes.pop(0)
+                deleted.append(keep.pop(0))
+
+        if not deleted:
+            return []
+
+        for segment in deleted:
+            try:
+                os.remove(segment.path)
+            except FileNotFoundError:
+                pass
+        with self._lock, open(self.index_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            for segment in keep:
+                writer.writerow([os.path.basename(segment.path), f"{segment.start:.3f}", f"{segment.end:.3f}"])
+        self.logger.info(f"Deleted {len(deleted)} old segments")
+        return deleted
+
+    def export_clip(self, start, end, output):
+        """Copy a time range out of the recorded segments without re-encoding.
+
+        Packets are copied, so the clip starts at the keyframe before ``start``.
+
+        Args:
+            start (float): Clip start as a time.time() value
+            end (float): Clip end as a time.time() value
+            output (str): File to write, its extension picks the container
+
+        Raises:
+            ValueError: If no segments overlap the range
+        """
+        segments = self.segments(start, end)
+        if not segments:
+            raise ValueError("No recorded segments in that time range")
+
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            for segment in segments:
+                path = os.path.abspath(segment.path).replace("'", "'\\''")
+                f.write(f"file '{path}'\n")
+            concat_list = f.name
+
+        try:
+            subprocess.run([
+                'ffmpeg',
+                '-loglevel', 'error',
+                '-y',
+                '-f', 'concat',
+                '-safe', '0',
+                # seeking on the input starts the copy at the keyframe before start
+                '-ss', f"{max(0.0, start - segments[0].start):.3f}",
+                '-i', concat_list,
+                '-t', f"{end - max(start, segments[0].start):.3f}",
+                '-map', '0',
+                '-c', 'copy',
+                output
+            ], check=True)
+        finally:
+            os.remove(concat_list)
@@ -0,0 +1,141 @@
+import logging
+import re
+from .robot import Robot
+
+_REG_RESPONSE = re.compile(r"REG(\d{3})=(.*)")
+
+class RegisterMap():
+    """Cached view of the robot's registers.
+
+    Registers are read many at a time by packing QUERY_REG commands into a
+    single request. Writes are queued until flush, which sends them in as few
+    requests as possible followed by one SAVE_REG.
+
+    Args:
+        robot (Robot): Robot to read registers from
+        batch_size (int): Number of registers per request (default 16)
+    """
+
+    def __init__(self, robot, batch_size=16):
+        self.robot = robot
+        self.batch_size = batch_size
+        self.logger = logging.getLogger('Robot Registers')
+        self._cache = {}
+        self._pending = {}
+
+    def _parse(self, response):
+        """Update the cache from a response and return the registers it contained."""
+        try:
+            json = response.json()
+        except (AttributeError, ValueError):
+            self.logger.warning("Couldn't parse JSON in register response")
+            return {}
+
+        values = {}
+        for text in self.robot._find_responses(json, "REG"):
+            match = _REG_RESPONSE.fullmatch(text.strip())
+            if not match:
+                continue
+            value = match.group(2)
+            values[int(match.group(1))] = int(value) if value.lstrip('-').isdigit() else value
+        self._cache.update(values)
+        return values
+
+    def scan(self, start=0, stop=1000):
+        """Read a range of registers from the robot.
+
+        Args:
+            start (int, optional): First register (default 0)
+            stop (int, optional): Register after the last one to read (default 1000)
+
+        Returns:
+            dict: Register number to value for every register that answered
+        """
+        values = {}
+        for first in range(start, stop, self.batch_size):
+            registers = range(first, min(first + self.batch_size, stop))
+            response = self.robot.send_commands([(Robot.Command.QUERY_REG, reg) for reg in registers])
+            values.update(self._parse(response))
+        return values
+
+    def read(self, register, refresh=False):
+        """Return a register value, from the cache unless refresh is set.
+
+        A register with a queued write returns the queued value until flush.
+
+        Args:
+            register (int): Register number (0-999)
+            refresh (bool, optional): Always query the robot (default False)
+
+        Returns:
+            Register value or None if the robot did not answer
+        """
+        if register in self._pending:
+            return self._pending[register]
+        if refresh or register not in self._cache:
+            self.scan(register, register + 1)
+        return self._cache.get(register)
+
+    def write(self, register, value):
+        """Queue a register write, sent on the next flush.
+
+        Args:
+            register (int): Register number (0-999)
+            value: Value to write
+        """
+        self._pending[register] = value
+        self._cache.pop(register, None)
+
+    def flush(self):
+        """Send all queued writes and save them on the robot with a single SAVE_REG.
+
+        Written registers are dropped from the cache, so the next read
+        returns the value the robot stored.
+        """
+        if not self._pending:
+            return
+        writes = [(Robot.Command.SET_REG, item) for item in self._pending.items()]
+        for first in range(0, len(writes), self.batch_size):
+            self.robot.send_commands(writes[first:first + self.batch_size])
+        self.robot._send_single_cmd(Robot.Command.SAVE_REG)
+        for register in self._pending:
+            # a scan while the write was queued may have cached the old value
+            self._cache.pop(register, None)
+        self._pending.clear()
+
+    def invalidate(self, register=None):
+        """Drop cached values so they are read again.
+
+        Args:
+            register (int, optional): Register to drop, all registers if omitted
+        """
+        if register is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(register, None)
+
+    def snapshot(self):
+        """Return a copy of the cached registers.
+
+        Returns:
+            dict: Register number to value
+        """
+        return dict(self._cache)
+
+    @staticmethod
+    def diff(old, new):
+        """Compare two snapshots.
+
+        Args:
+            old (dict): Earlier snapshot
+            new (dict): Later snapshot
+
+        Returns:
+            dict: Register number to (old value, new value) for every register that differs,
+            None stands in for registers missing from a snapshot
+        """
+        return {
+            reg: (old.get(reg), new.get(reg))
+            for reg in sorted(old.keys() | new.keys())
+            if old.get(reg) != new.get(reg)
+        }
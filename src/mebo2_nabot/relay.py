@@ -0,0 +1,223 @@
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import numpy as np
+
+class SyntheticCamera():
+    """Stand-in for Robot.Camera that generates a moving test pattern.
+
+    Args:
+        width (int): Frame width (default 640)
+        height (int): Frame height (default 480)
+        fps (float): Frames per second (default 15)
+    """
+
+    def __init__(self, width=640, height=480, fps=15):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.sequence = 0
+        self._frame = np.zeros((height, width, 3), dtype=np.uint8)
+        self._next = None
+
+    def open(self):
+        """Start generating frames."""
+        self._next = time.monotonic()
+
+    def read_latest(self, timeout=None):
+        """Wait for the next frame of the pattern.
+
+        Returns:
+            tuple: Frame, capture time and sequence number
+        """
+        if self._next is None:
+            self._next = time.monotonic()
+        self._next += 1 / self.fps
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        self.sequence += 1
+        self._frame[:] = 40
+        x = self.sequence * 4 % self.width
+        self._frame[:, x:x + 20] = (0, 200, 255)
+        cv2.putText(self._frame, str(self.sequence), (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        return self._frame, time.time(), self.sequence
+
+    def read(self):
+        """Wait for the next frame of the pattern.
+
+        Returns:
+            numpy.ndarray: Video frame
+        """
+        return self.read_latest()[0]
+
+    def close(self):
+        """Stop generating frames."""
+        self._next = None
+
+class MediaRelay():
+    """Serve one camera to many local viewers as MJPEG over HTTP.
+
+    Frames are pulled from the source once and JPEG encoded once, then
+    shared by every viewer. Each viewer is sent the newest frame whenever
+    it is ready for one, so a slow viewer skips frames without delaying the
+    others. Endpoints:
+
+    - ``/stream.mjpg``: multipart MJPEG stream, viewable in a browser or with ffplay
+    - ``/snapshot.jpg``: the newest frame
+    - ``/metrics``: JSON with per-viewer frames sent, frames skipped and lag
+
+    Args:
+        source: Opened Robot.Camera, FrameSubscriber, SyntheticCamera or anything with ``read_latest()``
+        host (str): Address to listen on (default "127.0.0.1")
+        port (int): Port to listen on, 0 picks a free one (default 8080)
+        quality (int): JPEG quality (default 80)
+        retry_delay (float): Seconds to wait when the source returns no frame (default 0.1)
+    """
+
+    def __init__(self, source, host="127.0.0.1", port=8080, quality=80, retry_delay=0.1):
+        self.source = source
+        self.quality = quality
+        self.retry_delay = retry_delay
+        self.logger = logging.getLogger('Media Relay')
+        self.clients = {}
+        self._jpeg = None
+        self._timestamp = None
+        self._sequence = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def address(self):
+        """tuple: Host and port the relay is listening on"""
+        return self.server.server_address
+
+    def start(self):
+        """Start pulling frames and serving viewers."""
+        self._running = True
+        self._thread = threading.Thread(target=self._capture, daemon=True)
+        self._thread.start()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        """Stop serving and pulling frames."""
+        self._running = False
+        self.server.shutdown()
+        self.server.server_close()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _capture(self):
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        # a FrameSubscriber's read_latest doesn't wait for new frames
+        read = getattr(self.source, 'read_next', None) or self.source.read_latest
+        while self._running:
+            frame, timestamp, _ = read(timeout=1.0)
+            if frame is None:
+                # a failed non-threaded camera returns at once, don't spin on it
+                with self._cond:
+                    self._cond.wait_for(lambda: not self._running, self.retry_delay)
+                continue
+            ok, jpeg = cv2.imencode('.jpg', frame, params)
+            if not ok:
+                continue
+            with self._cond:
+                self._jpeg = jpeg.tobytes()
+                self._timestamp = timestamp
+                self._sequence += 1
+                self._cond.notify_all()
+
+    def _wait_frame(self, last_sequence, timeout=5.0):
+        """Wait for a frame newer than last_sequence, returns (jpeg, timestamp, sequence) or None."""
+        with self._cond:
+            last_sequence = max(last_sequence, 0)
+            if not self._cond.wait_for(lambda: self._sequence > last_sequence or not self._running, timeout):
+                return None
+            if not self._running:
+                return None
+            return self._jpeg, self._timestamp, self._sequence
+
+    def metrics(self):
+        """Return relay and per-viewer statistics.
+
+        Returns:
+            dict: Frames relayed and, per viewer, frames sent, frames skipped and lag in seconds
+        """
+        return {
+            'frames': self._sequence,
+            'clients': {name: dict(stats) for name, stats in list(self.clients.items())}
+        }
+
+    def _handler(self):
+        relay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                relay.logger.debug(format % args)
+
+            def do_GET(self):
+                if self.path == '/stream.mjpg':
+                    self._stream()
+                elif self.path == '/snapshot.jpg':
+                    frame = relay._wait_frame(relay._sequence - 1)
+                    if not frame:
+                        self.send_error(503)
+                        return
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'image/jpeg')
+                    self.send_header('Content-Length', str(len(frame[0])))
+                    self.end_headers()
+                    self.wfile.write(frame[0])
+                elif self.path == '/metrics':
+                    body = json.dumps(relay.metrics()).encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self.send_error(404)
+
+            def _stream(self):
+                name = f"{self.client_address[0]}:{self.client_address[1]}"
+                stats = {'sent': 0, 'skipped': 0, 'lag': 0.0, 'connected': time.time()}
+                relay.clients[name] = stats
+
+                self.send_response(200)
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+                self.end_headers()
+
+                last = relay._sequence - 1
+                try:
+                    while relay._running:
+                        frame = relay._wait_frame(last)
+                        if not frame:
+                            continue
+                        jpeg, timestamp, sequence = frame
+                        if stats['sent']:
+                            stats['skipped'] += sequence - last - 1
+                        last = sequence
+
+                        self.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\n')
+                        self.wfile.write(f'Content-Length: {len(jpeg)}\r\n\r\n'.encode())
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b'\r\n')
+                        stats['sent'] += 1
+                        stats['lag'] = time.time() - timestamp
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    relay.clients.pop(name, None)
+
+        return Handler
@@ -3,10 +3,17 @@ import logging
 import requests
 import os
 import subprocess
+import threading
+import queue
+from collections import deque
 import cv2
 import numpy as np
 from enum import Enum, auto
 import enum_tools.documentation
+from .audio import SAMPLE_FORMATS, AlawEncoder, AlawSender, Pacer, VoiceActivityDetector, decode_file
+from .battery import BatteryEstimator
+from .clock import Clock
+from .transport import HttpTransport
 
 class Robot():
 
@@ -43,8 +50,8 @@ class Robot():
         CAL_WRIST_ROTATE = "DQ" #: test
         CAL_CLAW = "Dg"
         CAL_ALL = "D_"
-        QUERY_REG = auto() #: Exact function unknown
-        SET_REG = auto() #: Exact function unknown
+        QUERY_REG = auto() #: Exact function unknown, value is the register number
+        SET_REG = auto() #: Exact function unknown, value is a (register, data) tuple
         SAVE_REG = "REG=FLUSH" #: Exact function unknown
         QUERY_EVENT = "*" #: Exact function unknown
 
@@ -73,6 +80,10 @@ class Robot():
     battery_percent = -1
     # default speed
     speed = 50
+    # optional CommandRecorder, see mebo2_nabot.recorder
+    recorder = None
+    # optional TelemetryRecorder, see mebo2_nabot.telemetry
+    telemetry = None
 
     robot_joint_position_dict = {
         Position.ARM: 0,
@@ -83,6 +94,11 @@ class Robot():
 
     __instance = None
 
+    @staticmethod
+    def resetInstance():
+        """Forget the singleton instance so a new Robot can be created, e.g. between tests."""
+        Robot.__instance = None
+
     @staticmethod
     def getInstance():
         """Get the singleton instance of the Robot class.
@@ -94,8 +110,12 @@ class Robot():
             Robot()
         return Robot.__instance
     
-    def __init__(self):
+    def __init__(self, clock=None, transport=None):
         """Initialize the connection and send initialization commands.
+
+        Args:
+            clock (Clock, optional): Clock used for waiting and timing, e.g. a VirtualClock in tests (default real time)
+            transport (HttpTransport, optional): Sends the requests, e.g. a FakeTransport in tests (default HTTP)
         
         Raises:
             Exception: If trying to create multiple instances (singleton violation)
@@ -106,6 +126,13 @@ class Robot():
             Robot.__instance = self
 
         self.logger = logging.getLogger('Robot Commands')
+        self.clock = clock or Clock()
+        self.transport = transport or HttpTransport()
+        self.battery = BatteryEstimator(clock=self.clock)
+        self.wheel_speeds = [0, 0]
+        # serializes requests and the state they update, so several threads
+        # (e.g. a teleop loop and a GUI) can share the robot
+        self._lock = threading.RLock()
 
         init_commands = [
             self.Command.ACEAA, 
@@ -172,13 +199,11 @@ class Robot():
         """        
         for attempt in range(retries):
             try:
-                return requests.get(url=url, verify=False, timeout=1)
+                return self.transport.get(url)
             except requests.RequestException as e:
                 self.logger.warning(f"Attempt {attempt + 1}/{retries} failed: {e}")
-                # sometimes port 80 closes, poking 554 (RTSP) seems to open it back up
-                try: requests.get("http://192.168.99.1:554") 
-                except: pass          
-                time.sleep(delay)
+                self.transport.wake()
+                self.clock.sleep(delay)
 
         self.logger.error(f"Failed to reach {url} after multiple retries")
         return False
@@ -193,13 +218,52 @@ class Robot():
         Returns:
             dict: JSON response or False
         """
-        URL = "http://192.168.99.1/ajax/command.json?" + self._gen_single_cmd(cmd, number=1, value=value)
+        with self._lock:
+            URL = "http://192.168.99.1/ajax/command.json?" + self._gen_single_cmd(cmd, number=1, value=value)
+            start = self.clock.monotonic()
+            response = self._send_request(URL)
+            self._log_request(((cmd, value),), start)
         try:
-            return self._send_request(URL).json()
+            return response.json()
         except:
             self.logger.warning(f"Couldn't parse JSON in {cmd} response")
             return False
 
+    def _log_request(self, commands, start):
+        """Pass a finished request to the attached recorder and telemetry.
+
+        Args:
+            commands (iterable): (Command, value) pairs sent in the request
+            start (float): clock.monotonic() when the request was sent
+        """
+        latency = self.clock.monotonic() - start
+        if self.recorder:
+            self.recorder.record(commands, start, latency)
+        if self.telemetry:
+            self.telemetry.record_command(commands, latency)
+
+    @staticmethod
+    def _find_responses(json, prefix):
+        """Collect response strings starting with a prefix.
+
+        Works for single command responses as well as responses to requests
+        carrying several commands.
+
+        Args:
+            json: Parsed JSON response
+            prefix (str): Start of the responses to collect (e.g. "BAT=")
+
+        Returns:
+            list: Matching response strings
+        """
+        if isinstance(json, str):
+            return [json] if json.startswith(prefix) else []
+        if isinstance(json, dict):
+            json = json.values()
+        elif not isinstance(json, list):
+            return []
+        return [response for value in json for response in Robot._find_responses(value, prefix)]
+
     def _gen_single_cmd(self, command: Command, number=None, value=None):
         """Generate URL suffix for a single command."""
         if command in [
@@ -255,8 +319,11 @@ class Robot():
             digits = f"{int(value/100)%10}{int(value/10)%10}{int(value)%10}"
             return f"command{number}=mebolink_message_send(REG{digits}=?)"
         
+        # value is a (register, data) tuple, written the same way queries are answered
         if command == self.Command.SET_REG:
-            return f"command{number}=mebolink_message_send()"
+            register, data = value
+            digits = f"{int(register/100)%10}{int(register/10)%10}{int(register)%10}"
+            return f"command{number}=mebolink_message_send(REG{digits}={data})"
         
         return f"command{number}=mebolink_message_send()"
 
@@ -309,23 +376,61 @@ class Robot():
             safe_command = self._apply_limits(command)
             if safe_command:
                 self.send_joint_values(safe_command)
-                time.sleep(sleep)
+                self.clock.sleep(sleep)
             else: break 
 
     def send_joint_values(self, joint_dict: dict[Command, int]):
         """Send multiple joint/motor commands.
+
+        A battery query is added to the request whenever the battery estimator is due a sample.
         
         Args:
             joint_dict (dict): Dictionary mapping joint/motor names to their command values
         """
+        with self._lock:
+            if self.Command.WHEEL_LEFT_FORWARD in joint_dict:
+                self.wheel_speeds[0] = joint_dict[self.Command.WHEEL_LEFT_FORWARD]
+            if self.Command.WHEEL_RIGHT_FORWARD in joint_dict:
+                self.wheel_speeds[1] = joint_dict[self.Command.WHEEL_RIGHT_FORWARD]
+            self.battery.update_load(*self.wheel_speeds)
+
+            sample_battery = self.battery.due() and self.Command.BAT not in joint_dict
+            if sample_battery:
+                joint_dict = {**joint_dict, self.Command.BAT: None}
+
+            response = self.send_commands(list(joint_dict.items()))
+
+            if sample_battery and response:
+                try:
+                    self._update_battery(response.json())
+                except ValueError:
+                    self.logger.warning("Couldn't parse JSON in battery response")
+            return response
+    
+    def send_commands(self, commands: list[tuple[Command, object]]):
+        """Send several commands in one request.
+
+        Unlike send_joint_values the same command may appear more than once,
+        e.g. to query many registers at a time.
+
+        Args:
+            commands (list): (Command, value) pairs to send in order
+
+        Returns:
+            request.Response: Request response or False if all retries fail
+        """
         URL = "http://192.168.99.1/ajax/command.json?"
 
-        for i, (name, value) in enumerate(joint_dict.items()):
-            if i > 0:
-                URL += "&"
-            URL += self._gen_single_cmd(number=i + 1, command=name, value=value)
-        return self._send_request(URL)
-    
+        with self._lock:
+            for i, (name, value) in enumerate(commands):
+                if i > 0:
+                    URL += "&"
+                URL += self._gen_single_cmd(number=i + 1, command=name, value=value)
+            start = self.clock.monotonic()
+            response = self._send_request(URL)
+            self._log_request(commands, start)
+        return response
+
     def stop(self):
         """Stop all movement."""
         
@@ -488,11 +593,12 @@ class Robot():
     
     def toggle_claw_led(self):
         """Toggle claw LED on and off."""
-        response = self._send_single_cmd(self.Command.CLAW_LED_STATE)
-        if response['response'] == "ON":
-            self._send_single_cmd(self.Command.LIGHT_OFF)
-        else:
-            self._send_single_cmd(self.Command.LIGHT_ON)
+        with self._lock:
+            response = self._send_single_cmd(self.Command.CLAW_LED_STATE)
+            if response['response'] == "ON":
+                self._send_single_cmd(self.Command.LIGHT_OFF)
+            else:
+                self._send_single_cmd(self.Command.LIGHT_ON)
 
     def set_speed(self, speed):
         """Set default movement speed.
@@ -503,33 +609,35 @@ class Robot():
         self.speed = speed
 
     def get_battery(self):
-        """Query and return an estimated battery charge percentage 
-        
+        """Return an estimated battery charge percentage.
+
+        Battery samples are piggybacked on movement commands, a dedicated
+        query is only sent when no recent sample is available.
+
         Returns:
             int: Percent estimated battery charge remaining
         """
-        json = self._send_single_cmd(self.Command.BAT)
-        
-        if json['response'].startswith("BAT="):
-            response = json['response']
+        with self._lock:
+            if not self.battery.fresh():
+                json = self._send_single_cmd(self.Command.BAT)
+                if json:
+                    self._update_battery(json)
+
+            return self.battery_percent
+
+    def _update_battery(self, json):
+        """Feed BAT responses into the battery estimator.
+
+        Args:
+            json (dict): JSON response that may contain BAT= values
+        """
+        for response in self._find_responses(json, "BAT="):
             value = int(response[4:])
-            # battery value seems like a voltage
-            # 415 seemed to be the lowest value before poweroff
-            # max value at full speed on full battery for me seemed to be about 730 so we'll use that as a baseline
-            # max value at idle was 800 so we'll start with that to estimate before movement
-            # we'll always assume lowest value
-            max_idle = 800
-            max_load = 730
-            min_load = 415
-
-            if self.battery_percent == -1 or value > max_load:
-                percent = max(0, min(100, round((value - min_load) / (max_idle - min_load) * 100)))
-            if value <= max_load:
-                percent = max(0, min(100, round((value - min_load) / (max_load - min_load) * 100)))
-            if self.battery_percent == -1 or percent < self.battery_percent:
-                self.battery_percent = percent
-
-        return self.battery_percent
+            self.battery.add_sample(value)
+            self.battery_percent = self.battery.percent
+
+            if self.telemetry:
+                self.telemetry.record_battery(value, self.battery_percent)
 
     def get_joint_positions(self) -> dict[Position, int]:
         """Query and return current joint positions.
@@ -553,6 +661,9 @@ class Robot():
                 self.logger.warning(f"Error parsing {position.name}: {str(e)}")
                 return fallback_state
 
+        if self.telemetry:
+            self.telemetry.record_joints(self.robot_joint_position_dict)
+
         return self.robot_joint_position_dict.copy()
 
     def set_joint_positions(
@@ -586,65 +697,78 @@ class Robot():
                 adjusted_goal[position.control_command] = current
 
         loop_counter = 0
-        last_command_time = time.time()
+        last_command_time = self.clock.monotonic()
 
         # set claw first, takes exact position
         self._send_single_cmd(self.Command.CLAW_POSITION, adjusted_goal[self.Command.CLAW_POSITION])
 
         while True:
-            if time.time() - last_command_time > 0.1:
-                time.sleep(0.1)
-                joint_states = self.get_joint_positions()
-                diff_command = {}
-                max_diff = 0
-
-                for cmd, target in adjusted_goal.items():
-                    if cmd is not self.Command.CLAW_POSITION:
-                        if cmd == self.Command.ARM_UP:
-                            position = self.Position.ARM
-                            current = joint_states[position]
-                            diff = (target - current) * 6 / 3 * -1
-                        elif cmd == self.Command.WRIST_UD_UP:
-                            position = self.Position.WRIST_UD
-                            current = joint_states[position]
-                            diff = (target - current) * 6
-                        elif cmd == self.Command.WRIST_ROTATE_LEFT:
-                            position = self.Position.WRIST_ROTATE
-                            current = joint_states[position]
-                            diff = (target - current) * 6
-                    else:
-                        continue
-
-                    diff = max(-max_speed, min(max_speed, diff))
-                    diff_command[cmd] = diff
-                    max_diff = max(max_diff, abs(diff))
-
-                self.logger.debug(f"States: {joint_states}")
-                self.logger.debug(f"Diffs: {diff_command}")
-
-                if max_diff < stop_threshold or loop_counter > max_loops:
-                    stop_command = {
-                        self.Command.ARM_UP: 0.0,
-                        self.Command.WRIST_UD_UP: 0.0,
-                        self.Command.WRIST_ROTATE_LEFT: 0.0,
-                    }
-                    self.send_joint_values(stop_command)
-                    break
-
-                self.send_joint_values(diff_command)
-                last_command_time = time.time()
-                loop_counter += 1
+            # wait out the rest of the 0.1s since the last command instead of spinning
+            self.clock.sleep(last_command_time + 0.1 - self.clock.monotonic())
+            self.clock.sleep(0.1)
+            joint_states = self.get_joint_positions()
+            diff_command = {}
+            max_diff = 0
+
+            for cmd, target in adjusted_goal.items():
+                if cmd is not self.Command.CLAW_POSITION:
+                    if cmd == self.Command.ARM_UP:
+                        position = self.Position.ARM
+                        current = joint_states[position]
+                        diff = (target - current) * 6 / 3 * -1
+                    elif cmd == self.Command.WRIST_UD_UP:
+                        position = self.Position.WRIST_UD
+                        current = joint_states[position]
+                        diff = (target - current) * 6
+                    elif cmd == self.Command.WRIST_ROTATE_LEFT:
+                        position = self.Position.WRIST_ROTATE
+                        current = joint_states[position]
+                        diff = (target - current) * 6
+                else:
+                    continue
+
+                diff = max(-max_speed, min(max_speed, diff))
+                diff_command[cmd] = diff
+                max_diff = max(max_diff, abs(diff))
+
+            self.logger.debug(f"States: {joint_states}")
+            self.logger.debug(f"Diffs: {diff_command}")
+
+            if max_diff < stop_threshold or loop_counter > max_loops:
+                stop_command = {
+                    self.Command.ARM_UP: 0.0,
+                    self.Command.WRIST_UD_UP: 0.0,
+                    self.Command.WRIST_ROTATE_LEFT: 0.0,
+                }
+                self.send_joint_values(stop_command)
+                break
+
+            self.send_joint_values(diff_command)
+            last_command_time = self.clock.monotonic()
+            loop_counter += 1
 
     class Speaker:
         """Class for handling audio output to the robot's speaker.
         
-        Uses ffmpeg to stream audio to the robot over UDP.
+        The native backend converts audio to the robot's 8 kHz A-law format
+        in process and sends it straight to the robot as UDP datagrams, ffmpeg
+        is only started to decode audio files. The ffmpeg backend pipes all
+        audio through an ffmpeg process that streams it to the robot.
         
         Optional args:
             rate (int): Audio sample rate
             channels (int): Number of audio channels
             input_format (str): Audio input format
-            channel_layout (str): Audio channel layout
+            channel_layout (str): Audio channel layout, only used by the ffmpeg backend
+            backend (str): "native" or "ffmpeg" (default "native")
+            host (str): Robot address (default "192.168.99.1")
+            port (int): Robot audio port (default 8828)
+            cache (ClipCache): Cache of encoded files used by send_file with the native backend
+            pacer (Pacer): Pacer for the audio sent, can be shared with other speakers (default a new Pacer)
+            clock (Clock): Clock for the default pacer, e.g. a VirtualClock in tests (default real time)
+            mixer (Mixer): Started Mixer to play through instead of sending audio directly
+            gain (float): Volume multiplier when playing through a mixer (default 1.0)
+            priority (int): Mixer priority, lower priority sources are ducked while this speaker plays (default 0)
         """
         
         def __init__(self, **kwargs):
@@ -652,6 +776,21 @@ class Robot():
             self.channels = kwargs.get('channels')
             self.input_format = kwargs.get('input_format')
             self.channel_layout = kwargs.get('channel_layout')
+            self.backend = kwargs.get('backend', 'native')
+            self.host = kwargs.get('host', '192.168.99.1')
+            self.port = kwargs.get('port', 8828)
+            self.cache = kwargs.get('cache')
+            self.pacer = kwargs.get('pacer') or Pacer(clock=kwargs.get('clock'))
+            self.mixer = kwargs.get('mixer')
+            self.gain = kwargs.get('gain', 1.0)
+            self.priority = kwargs.get('priority', 0)
+            if self.backend not in ('native', 'ffmpeg'):
+                raise ValueError(f"Unsupported speaker backend: {self.backend}")
+
+            self.ffmpeg = None
+            self.encoder = None
+            self.sender = None
+            self.source = None
 
             # general ffmpeg flags
             self.ffmpeg_cmd = [
@@ -668,18 +807,43 @@ class Robot():
                 '-f', 'alaw', 
                 '-ar', '8000', 
                 '-ac', '1', 
-                'udp://192.168.99.1:8828?connect=1'
+                f'udp://{self.host}:{self.port}?connect=1'
             ]
 
             # numpy specific params
             self.numpy_cmd = [
-                '-f', self.input_format,
+                '-f', str(self.input_format),
                 '-ar', str(self.rate),
                 '-ac', str(self.channels),
-                '-channel_layout', self.channel_layout,
+                '-channel_layout', str(self.channel_layout),
                 '-i', 'pipe:0'
             ] + self.stream_params
 
+        def _check_format(self):
+            required = [self.rate, self.channels, self.input_format]
+            if self.backend == 'ffmpeg':
+                required.append(self.channel_layout)
+            if not all(required):
+                raise ValueError("Missing required parameters for numpy mode.")
+
+        def _play(self, alaw):
+            """Send A-law audio in real time, alaw is an iterable of byte strings."""
+            sender = AlawSender(self.host, self.port)
+            self.pacer.reset()
+            try:
+                for data in alaw:
+                    for i in range(0, len(data), sender.packet_size):
+                        packet = data[i:i + sender.packet_size]
+                        self.pacer.wait(len(packet) / AlawEncoder.RATE)
+                        sender.send(packet)
+            finally:
+                sender.close()
+
+        def _duration(self, data):
+            """Seconds of audio in raw input data."""
+            dtype = SAMPLE_FORMATS.get(self.input_format, SAMPLE_FORMATS['s16le'])
+            return len(data) / (dtype.itemsize * self.channels * self.rate)
+
         def send_file(self, file):
             """Stream an audio file to the robot's speaker.
             Audio format can usually be detected by ffmpeg.
@@ -691,12 +855,24 @@ class Robot():
                 if not (isinstance(file, str) and os.path.isfile(file)):
                     print(f"Can't read file: {file}")
                     return
+
+                if self.mixer:
+                    self.mixer.play_file(file, self.gain, self.priority, input_format=self.input_format).wait()
+                    return
+
+                if self.backend == 'native':
+                    if self.cache:
+                        self._play([self.cache.get(file)])
+                    else:
+                        self._play(decode_file(file, self.input_format))
+                    return
                 
+                ffmpeg_cmd = list(self.ffmpeg_cmd)
                 if self.input_format:
-                    self.ffmpeg_cmd += ['-f', self.input_format]
+                    ffmpeg_cmd += ['-f', self.input_format]
                     
-                self.ffmpeg_cmd += ['-i', file] + self.stream_params            
-                subprocess.run(self.ffmpeg_cmd)
+                ffmpeg_cmd += ['-i', file] + self.stream_params            
+                subprocess.run(ffmpeg_cmd)
                 return
 
         def send_array(self, array, buffer_size=128):
@@ -705,30 +881,51 @@ class Robot():
             
             Args:
                 array (numpy.ndarray): Array to play
-                buffer_size (int): Size of buffers to send in bytes (default is 128)
+                buffer_size (int): Size of buffers to send in bytes with the ffmpeg backend (default is 128)
                 
             Raises:
                 ValueError: If required parameters are missing
             """
-            if not all([self.rate, self.channels, self.input_format, self.channel_layout]):
-                raise ValueError("Missing required parameters for numpy mode.")
+            self._check_format()
+
+            if self.mixer:
+                self.mixer.play_array(array, self.rate, self.channels, self.input_format, self.gain, self.priority).wait()
+                return
+
+            if self.backend == 'native':
+                encoder = AlawEncoder(self.rate, self.channels, self.input_format)
+                self._play([encoder.encode(array)])
+                return
 
-            self.ffmpeg_cmd += self.numpy_cmd
-            self.ffmpeg = subprocess.Popen(self.ffmpeg_cmd, stdin=subprocess.PIPE)
+            self.ffmpeg = subprocess.Popen(self.ffmpeg_cmd + self.numpy_cmd, stdin=subprocess.PIPE)
+            self.pacer.reset()
 
-            for i in range(0, len(array), buffer_size):
-                self.write(array[i:i + buffer_size].tobytes())
-                time.sleep(buffer_size / self.rate)
-            self.close_numpy_stream()
+            data = np.ascontiguousarray(array).tobytes()
+            for i in range(0, len(data), buffer_size):
+                self.write(data[i:i + buffer_size])
+            self.close()
 
         def open(self):
-            """Start ffmpeg and open audio stream for writing."""
-            self.ffmpeg_cmd += self.numpy_cmd
-            self.ffmpeg = subprocess.Popen(self.ffmpeg_cmd, stdin=subprocess.PIPE)            
+            """Open audio stream for writing, starting ffmpeg with the ffmpeg backend."""
+            if self.mixer:
+                self._check_format()
+                self.source = self.mixer.open_stream(self.rate, self.channels, self.input_format, self.gain, self.priority)
+                return
+
+            if self.backend == 'native':
+                self._check_format()
+                self.encoder = AlawEncoder(self.rate, self.channels, self.input_format)
+                self.sender = AlawSender(self.host, self.port)
+                self.pacer.reset()
+                return
+
+            self.ffmpeg = subprocess.Popen(self.ffmpeg_cmd + self.numpy_cmd, stdin=subprocess.PIPE)            
+            self.pacer.reset()
 
         def write(self, data):
             """Write numpy data to open stream.
             Requires audio format information passed to instance of class.
+            Blocks while more than the pacer's lead of audio is queued.
             
             Args:
                 data (bytes): Audio data to write
@@ -736,90 +933,672 @@ class Robot():
             Raises:
                 ValueError: If required parameters are missing
             """
-            if not all([self.rate, self.channels, self.input_format, self.channel_layout]):
-                raise ValueError("Missing required parameters for numpy mode.")            
+            self._check_format()
             
-            if self.ffmpeg:
+            if self.source:
+                self.source.write(data)
+            elif self.sender:
+                alaw = self.encoder.encode(data)
+                self.pacer.wait(len(alaw) / AlawEncoder.RATE)
+                self.sender.send(alaw)
+            elif self.ffmpeg:
+                self.pacer.wait(self._duration(data))
                 self.ffmpeg.stdin.write(data)
 
         def close(self):
-            """Stop ffmpeg and close audio stream."""
+            """Close audio stream, stopping ffmpeg with the ffmpeg backend."""
+            if self.source:
+                self.source.close()
+                self.source = None
+            if self.sender:
+                self.sender.close()
+                self.sender = None
             if self.ffmpeg:
                 self.ffmpeg.stdin.close()
                 self.ffmpeg.wait()
+                self.ffmpeg = None
 
     class Microphone():
         """Class for handling audio input from the microphone.
         
         Uses ffmpeg to capture the RTSP audio stream.
+
+        A background thread reads ffmpeg's output with ``readinto`` straight
+        into a fixed ring of preallocated int16 chunks, so memory use is
+        constant and no buffers are allocated per chunk. Chunks are returned
+        as views into the ring and stay valid until the next read, the writer
+        never refills the slot of the chunk last returned. If the consumer
+        falls behind, the oldest unread chunks are overwritten and counted in
+        ``overruns``. A consumer keeping pace with the stream
+        waits for each chunk as it arrives, which is normal. Only reads that
+        time out, or that find the ring empty after audio had been queued
+        ahead of the consumer, are counted in ``underruns``.
         
         Args:
             rate (int): Audio sample rate
-            channels (int): Number of audio channels
-            buffer_size (int): Size of audio buffers to read in bytes (default 4000)
+            buffer_size (int): Samples per audio chunk (default 4000)
+            ring_size (int): Number of chunks in the ring (default 8)
+            url (str): Stream to capture (default "rtsp://192.168.99.1/media/stream2")
         """
         
-        def __init__(self, rate, buffer_size=4000):
+        def __init__(self, rate, buffer_size=4000, ring_size=8, url="rtsp://192.168.99.1/media/stream2"):
+            if ring_size < 2:
+                raise ValueError("Ring needs at least 2 chunks")
+
             self.rate = rate
             self.buffer_size = buffer_size
+            self.url = url
+            self.overruns = 0
+            self.underruns = 0
+            self.process = None
+            self._ring = np.zeros((ring_size, buffer_size), dtype=np.int16)
+            # slots holding unread chunks in capture order, empty slots, and the slot last returned
+            self._queue = deque()
+            self._free = deque(range(ring_size))
+            self._held = None
+            self._ahead = False
+            self._closed = True
+            self._cond = threading.Condition()
+            self._thread = None
+
+        @property
+        def latency(self):
+            """float: Seconds of audio in one chunk"""
+            return self.buffer_size / self.rate
 
         def open(self):
             """Open microphone stream."""
             ffmpeg_cmd = [
                 'ffmpeg',
                 '-loglevel', 'quiet',
-                '-i', "rtsp://192.168.99.1/media/stream2",
+                '-fflags', 'nobuffer',
+                '-i', self.url,
                 '-f', 's16le',
                 '-acodec', 'pcm_s16le',
                 '-ac', '1',
                 '-ar', str(self.rate),
                 '-'
             ]
-            self.process = subprocess.Popen(ffmpeg_cmd, stdout=subprocess.PIPE, bufsize=10**8)
+            self.process = subprocess.Popen(ffmpeg_cmd, stdout=subprocess.PIPE, bufsize=self._ring[0].nbytes)
+            self._queue = deque()
+            self._free = deque(range(len(self._ring)))
+            self._held = None
+            self._ahead = False
+            self._closed = False
+            self._thread = threading.Thread(target=self._fill, daemon=True)
+            self._thread.start()
+
+        def _fill(self):
+            pipe = self.process.stdout
+            while True:
+                skipped = False
+                with self._cond:
+                    if self._free:
+                        slot = self._free.popleft()
+                    else:
+                        # every slot but the held one is unread, reuse the oldest
+                        slot = self._queue.popleft()
+                        self.overruns += 1
+                        skipped = True
+                view = memoryview(self._ring[slot]).cast('B')
+
+                filled = 0
+                while filled < len(view):
+                    count = pipe.readinto(view[filled:])
+                    if not count:
+                        break
+                    filled += count
+                if filled < len(view):
+                    with self._cond:
+                        if skipped and filled == 0:
+                            # nothing was overwritten, give the skipped chunk back
+                            self._queue.appendleft(slot)
+                            self.overruns -= 1
+                        else:
+                            self._free.append(slot)
+                    break
+
+                with self._cond:
+                    self._queue.append(slot)
+                    self._cond.notify_all()
+
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+
+        def read_chunk(self, timeout=None):
+            """Read the next chunk of audio.
+
+            Args:
+                timeout (float, optional): Seconds to wait for audio
+
+            Returns:
+                numpy.ndarray: View of buffer_size int16 samples, valid until the next read,
+                or None when the stream ended or the timeout expired
+            """
+            with self._cond:
+                if not self._queue:
+                    if self._ahead:
+                        # the queued audio ran out
+                        self.underruns += 1
+                        self._ahead = False
+                    if not self._cond.wait_for(lambda: self._queue or self._closed, timeout):
+                        self.underruns += 1
+                if not self._queue:
+                    return None
+                if len(self._queue) > 1:
+                    self._ahead = True
+                if self._held is not None:
+                    self._free.append(self._held)
+                self._held = self._queue.popleft()
+                return self._ring[self._held]
 
         def read(self):
             """Generator that yields audio buffers from microphone.
             
             Yields:
-                numpy.ndarray: Buffers of audio data
+                numpy.ndarray: Buffers of audio data, views valid until the next buffer is read
             """
             while True:
-                raw = self.process.stdout.read(self.buffer_size * 2)
-                if not raw:
+                chunk = self.read_chunk()
+                if chunk is None:
                     break
-                audio_np = np.frombuffer(raw, dtype=np.int16)
-                yield audio_np
+                yield chunk
+
+        def read_speech(self, vad=None):
+            """Generator that yields only the parts of the stream that contain speech.
+
+            Args:
+                vad (VoiceActivityDetector, optional): Detector to use, one with default settings if omitted
+
+            Yields:
+                SpeechSegment: Start and end in seconds since the stream opened, and the int16 audio
+            """
+            vad = vad or VoiceActivityDetector(self.rate)
+            yield from vad.segments(self.read())
 
         def close(self):
             """Close microphone stream."""
-            self.process.terminate() 
+            if self.process:
+                self.process.terminate()
+                self.process.wait()
+                self.process = None
+            if self._thread:
+                self._thread.join()
+                self._thread = None
 
     class Camera():
         """Class for capturing video from the camera.
         
         Uses OpenCV to capture the RTSP video stream from robot.
+
+        The ffmpeg backend instead runs ffmpeg with low latency flags and
+        reads raw frames straight into preallocated buffers. Scaling and
+        pixel format conversion happen inside ffmpeg. Frames returned by this
+        backend are views into reused buffers and stay valid until ``buffers - 1``
+        newer frames have been decoded, copy them to keep them longer. In
+        threaded mode the buffer last returned by a read is never refilled, so
+        a frame stays valid until the next read however slow the consumer is.
+
+        In threaded mode a background thread decodes continuously into a
+        single latest-frame slot, so a slow consumer always gets the newest
+        frame instead of falling behind the stream. Frames that are replaced
+        before being read are counted in ``dropped`` and the stream is
+        reopened automatically if it fails.
+
+        Args:
+            url (str): Stream to capture (default "rtsp://192.168.99.1/media/stream2")
+            threaded (bool): Decode in a background thread (default False)
+            reconnect_delay (float): Seconds to wait before reopening a failed stream (default 1.0)
+            backend (str): "opencv" or "ffmpeg" (default "opencv")
+            width (int): ffmpeg backend frame width, probed from the stream if omitted
+            height (int): ffmpeg backend frame height, probed from the stream if omitted
+            pix_fmt (str): ffmpeg backend pixel format, one of PIX_FMT_CHANNELS (default "bgr24")
+            buffers (int): Number of reused ffmpeg backend frame buffers, at least 3 in threaded mode (default 3)
         """
+
+        #: Supported ffmpeg backend pixel formats and their channel counts
+        PIX_FMT_CHANNELS = {'bgr24': 3, 'rgb24': 3, 'bgra': 4, 'rgba': 4, 'gray': 1}
+
+        def __init__(self, url="rtsp://192.168.99.1/media/stream2", threaded=False, reconnect_delay=1.0,
+                     backend="opencv", width=None, height=None, pix_fmt="bgr24", buffers=3):
+            if backend not in ("opencv", "ffmpeg"):
+                raise ValueError(f"Unknown camera backend: {backend}")
+            if pix_fmt not in self.PIX_FMT_CHANNELS:
+                raise ValueError(f"Unsupported pixel format: {pix_fmt}")
+
+            self.url = url
+            self.threaded = threaded
+            self.reconnect_delay = reconnect_delay
+            self.backend = backend
+            self.width = width
+            self.height = height
+            self.pix_fmt = pix_fmt
+            self.logger = logging.getLogger('Camera')
+            self.cap = None
+            self.process = None
+            # threaded mode needs one buffer held by the consumer, one published and one being filled
+            self._buffers = [None] * max(3 if threaded else 1, buffers)
+            self._buffer_index = 0
+            self._filled = None
+            self._frame_slot = None
+            self._held = None
+            self.frame = None
+            self.timestamp = None
+            self.sequence = 0
+            self.dropped = 0
+            self._last_read = 0
+            self._running = False
+            self._thread = None
+            self._cond = threading.Condition()
         
         def open(self):
             """Open camera connection."""
-            self.cap = cv2.VideoCapture("rtsp://192.168.99.1/media/stream2")
-            self.cap.isOpened()
+            self._connect()
+            if self.threaded:
+                self._running = True
+                self._thread = threading.Thread(target=self._grab_loop, daemon=True)
+                self._thread.start()
+
+        def _connect(self):
+            if self.backend == "opencv":
+                self.cap = cv2.VideoCapture(self.url)
+                return self.cap.isOpened()
+
+            if not (self.width and self.height):
+                self.width, self.height = self.probe_size(self.url)
+
+            ffmpeg_cmd = [
+                'ffmpeg',
+                '-loglevel', 'quiet',
+                '-fflags', 'nobuffer',
+                '-flags', 'low_delay'
+            ]
+            if self.url.startswith("rtsp://"):
+                ffmpeg_cmd += ['-rtsp_transport', 'udp']
+            ffmpeg_cmd += [
+                '-i', self.url,
+                '-an',
+                '-vf', f'scale={self.width}:{self.height}',
+                '-f', 'rawvideo',
+                '-pix_fmt', self.pix_fmt,
+                'pipe:1'
+            ]
+            self.process = subprocess.Popen(ffmpeg_cmd, stdout=subprocess.PIPE)
+
+            shape = (self.height, self.width, self.PIX_FMT_CHANNELS[self.pix_fmt])
+            if self._buffers[0] is None or self._buffers[0].shape != shape:
+                self._buffers = [np.empty(shape, dtype=np.uint8) for _ in self._buffers]
+            return True
+
+        @staticmethod
+        def probe_size(url):
+            """Ask ffprobe for the width and height of a video stream.
+
+            Args:
+                url (str): Stream to probe
+
+            Returns:
+                tuple: Width and height in pixels
+
+            Raises:
+                RuntimeError: If the size couldn't be determined
+            """
+            output = subprocess.run([
+                'ffprobe',
+                '-v', 'error',
+                '-select_streams', 'v:0',
+                '-show_entries', 'stream=width,height',
+                '-of', 'csv=p=0',
+                url
+            ], stdout=subprocess.PIPE, text=True).stdout
+            try:
+                width, height = output.strip().split(',')[:2]
+                return int(width), int(height)
+            except ValueError:
+                raise RuntimeError(f"Couldn't probe video size of {url}, pass width and height")
+
+        def _disconnect(self):
+            if self.cap:
+                self.cap.release()
+                self.cap = None
+            if self.process:
+                self.process.terminate()
+                self.process.wait()
+                self.process = None
+
+        def _grab(self):
+            """Decode the next frame from the stream, returns None if capture fails."""
+            if self.backend == "opencv":
+                ret, frame = self.cap.read()
+                return frame if ret else None
+
+            index = self._buffer_index
+            with self._cond:
+                # never overwrite the frame the consumer is still using
+                if self.threaded and index == self._held:
+                    index = (index + 1) % len(self._buffers)
+            frame = self._buffers[index]
+            view = memoryview(frame).cast('B')
+            filled = 0
+            while filled < len(view):
+                count = self.process.stdout.readinto(view[filled:])
+                if not count:
+                    return None
+                filled += count
+            self._filled = index
+            self._buffer_index = (index + 1) % len(self._buffers)
+            return frame
+
+        def _publish(self, frame):
+            with self._cond:
+                if self.sequence > self._last_read:
+                    self.dropped += 1
+                self.frame = frame
+                self._frame_slot = self._filled
+                self.timestamp = time.time()
+                self.sequence += 1
+                self._cond.notify_all()
+
+        def _grab_loop(self):
+            while self._running:
+                frame = self._grab()
+                if frame is not None:
+                    self._publish(frame)
+                    continue
+
+                if not self._running:
+                    break
+                self.logger.warning(f"Lost video stream, reconnecting in {self.reconnect_delay}s")
+                self._disconnect()
+                time.sleep(self.reconnect_delay)
+                self._connect()
 
         def read(self):
             """Read a frame from camera.
+
+            In threaded mode this waits for a frame newer than the last one read.
             
             Returns:
                 numpy.ndarray: Video frame or None if capture fails
             """
-            if not self.cap:
-                return None
+            return self.read_latest()[0]
 
-            while True:
-                ret, frame = self.cap.read()
-                if not ret:
-                    return None
-                return frame
+        def read_latest(self, timeout=None):
+            """Read the newest frame along with when it was captured.
+
+            Args:
+                timeout (float, optional): Seconds to wait for a new frame in threaded mode
+
+            Returns:
+                tuple: Frame, capture time (time.time()) and sequence number,
+                or (None, None, None) if capture fails or times out
+            """
+            if not self.threaded:
+                # the grab thread reconnects in threaded mode, so only check here
+                if self.cap is None and self.process is None:
+                    return None, None, None
+                frame = self._grab()
+                if frame is None:
+                    return None, None, None
+                self._publish(frame)
+
+            with self._cond:
+                if not self._cond.wait_for(lambda: self.sequence > self._last_read or not self._running, timeout):
+                    return None, None, None
+                if self.sequence == self._last_read:
+                    return None, None, None
+                self._last_read = self.sequence
+                self._held = self._frame_slot
+                return self.frame, self.timestamp, self.sequence
 
         def close(self):
             """Close camera connection."""
-            self.cap.release()
\ No newline at end of file
+            self._running = False
+            if self.process:
+                # unblocks a grab thread waiting on the pipe
+                self.process.terminate()
+            if self._thread:
+                self._thread.join()
+                self._thread = None
+            self._disconnect()
+
+    class MediaSession():
+        """Class for receiving synchronized video and audio over one RTSP session.
+
+        A single ffmpeg process opens the stream, demuxes it and writes raw
+        video frames and PCM audio to separate pipes. Video is resampled to a
+        constant frame rate and audio is padded or trimmed to match the stream
+        clock from its very start, so timestamps follow from the number of
+        frames and samples received even if the audio starts late. read() pairs each frame with the audio samples covering its
+        frame interval, cut from a running buffer so chunk size and frame rate
+        don't need to divide evenly.
+
+        Needs a POSIX system, the audio pipe is passed to ffmpeg as an extra file descriptor.
+
+        Args:
+            url (str): Stream to open (default "rtsp://192.168.99.1/media/stream2")
+            width (int): Frame width, probed from the stream if omitted
+            height (int): Frame height, probed from the stream if omitted
+            fps (int): Output frame rate (default 15)
+            rate (int): Audio sample rate (default 16000)
+            audio_chunk (int): Samples per audio chunk (default rate / fps)
+            pix_fmt (str): Pixel format, one of Camera.PIX_FMT_CHANNELS (default "bgr24")
+            queue_size (int): Frames and chunks buffered before the oldest are dropped (default 8)
+        """
+
+        def __init__(self, url="rtsp://192.168.99.1/media/stream2", width=None, height=None, fps=15,
+                     rate=16000, audio_chunk=None, pix_fmt="bgr24", queue_size=8):
+            if pix_fmt not in Robot.Camera.PIX_FMT_CHANNELS:
+                raise ValueError(f"Unsupported pixel format: {pix_fmt}")
+
+            self.url = url
+            self.width = width
+            self.height = height
+            self.fps = fps
+            self.rate = rate
+            self.audio_chunk = audio_chunk or rate // fps
+            self.pix_fmt = pix_fmt
+            self.queue_size = queue_size
+            self.logger = logging.getLogger('Media Session')
+            self.process = None
+            self.dropped_frames = 0
+            self.dropped_audio = 0
+            self._video = queue.Queue(queue_size)
+            self._audio = queue.Queue(queue_size)
+            # audio read ahead of the last frame and the index of its first sample
+            self._pcm = np.empty(0, dtype=np.int16)
+            self._pcm_start = 0
+            self._audio_ended = False
+            self._threads = []
+
+        def open(self):
+            """Start ffmpeg and the reader threads."""
+            if not (self.width and self.height):
+                self.width, self.height = Robot.Camera.probe_size(self.url)
+
+            audio_read, audio_write = os.pipe()
+            ffmpeg_cmd = [
+                'ffmpeg',
+                '-loglevel', 'quiet',
+                '-fflags', 'nobuffer',
+                '-flags', 'low_delay'
+            ]
+            if self.url.startswith("rtsp://"):
+                ffmpeg_cmd += ['-rtsp_transport', 'udp']
+            ffmpeg_cmd += [
+                '-i', self.url,
+                '-map', '0:v:0',
+                '-vf', f'scale={self.width}:{self.height}',
+                '-r', str(self.fps),
+                '-vsync', 'cfr',
+                '-f', 'rawvideo',
+                '-pix_fmt', self.pix_fmt,
+                'pipe:1',
+                '-map', '0:a:0',
+                # pad the start too, so sample counts line up with the video timeline
+                '-af', 'aresample=async=1:first_pts=0',
+                '-f', 's16le',
+                '-acodec', 'pcm_s16le',
+                '-ac', '1',
+                '-ar', str(self.rate),
+                f'pipe:{audio_write}'
+            ]
+            self.process = subprocess.Popen(ffmpeg_cmd, stdout=subprocess.PIPE, pass_fds=(audio_write,))
+            os.close(audio_write)
+            self._audio_pipe = os.fdopen(audio_read, 'rb')
+
+            self._threads = [
+                threading.Thread(target=self._read_video, daemon=True),
+                threading.Thread(target=self._read_audio, daemon=True)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+        def _put(self, q, item):
+            """Queue an item, dropping the oldest one if the queue is full. Returns True if one was dropped."""
+            dropped = False
+            while True:
+                try:
+                    q.put_nowait(item)
+                    return dropped
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                        dropped = True
+                    except queue.Empty:
+                        pass
+
+        def _read_exact(self, pipe, buffer):
+            view = memoryview(buffer).cast('B')
+            filled = 0
+            while filled < len(view):
+                count = pipe.readinto(view[filled:])
+                if not count:
+                    return False
+                filled += count
+            return True
+
+        def _read_video(self):
+            shape = (self.height, self.width, Robot.Camera.PIX_FMT_CHANNELS[self.pix_fmt])
+            # frames are reused once they can no longer be in the queue or held by the reader
+            pool = [np.empty(shape, dtype=np.uint8) for _ in range(self.queue_size + 2)]
+            index = 0
+            while True:
+                frame = pool[index % len(pool)]
+                if not self._read_exact(self.process.stdout, frame):
+                    break
+                if self._put(self._video, (index / self.fps, frame)):
+                    self.dropped_frames += 1
+                index += 1
+            self._put(self._video, None)
+
+        def _read_audio(self):
+            samples = 0
+            while True:
+                chunk = np.empty(self.audio_chunk, dtype=np.int16)
+                if not self._read_exact(self._audio_pipe, chunk):
+                    break
+                if self._put(self._audio, (samples / self.rate, chunk)):
+                    self.dropped_audio += 1
+                samples += self.audio_chunk
+            self._put(self._audio, None)
+
+        def read_video(self, timeout=None):
+            """Read the next video frame.
+
+            Frames are views into reused buffers, copy them to keep them
+            longer than ``queue_size`` further frames.
+
+            Args:
+                timeout (float, optional): Seconds to wait for a frame
+
+            Returns:
+                tuple: Timestamp in seconds since the session started and the frame,
+                or None when the stream ended or the timeout expired
+            """
+            try:
+                return self._video.get(timeout=timeout)
+            except queue.Empty:
+                return None
+
+        def read_audio(self, timeout=None):
+            """Read the next chunk of audio.
+
+            Args:
+                timeout (float, optional): Seconds to wait for audio
+
+            Returns:
+                tuple: Timestamp in seconds since the session started and int16 samples,
+                or None when the stream ended or the timeout expired
+            """
+            if len(self._pcm):
+                chunk = (self._pcm_start / self.rate, self._pcm)
+                self._pcm_start += len(self._pcm)
+                self._pcm = self._pcm[:0]
+                return chunk
+            return self._get_audio(timeout)
+
+        def _get_audio(self, timeout):
+            if self._audio_ended:
+                return None
+            try:
+                audio = self._audio.get(timeout=timeout)
+            except queue.Empty:
+                return None
+            if audio is None:
+                self._audio_ended = True
+            return audio
+
+        def read(self, timeout=None):
+            """Read the next video frame together with the audio captured alongside it.
+
+            The audio is the samples from the frame's timestamp up to the next
+            frame's, so consecutive reads return contiguous audio. Audio older
+            than the frame is skipped. If part of it has not arrived yet or was
+            dropped, None is returned in its place.
+
+            Args:
+                timeout (float, optional): Seconds to wait for the frame and its audio
+
+            Returns:
+                tuple: Timestamp, frame and audio samples, or None when the stream ended
+            """
+            video = self.read_video(timeout)
+            if video is None:
+                return None
+            timestamp, frame = video
+
+            index = round(timestamp * self.fps)
+            start = index * self.rate // self.fps
+            end = (index + 1) * self.rate // self.fps
+            while self._pcm_start + len(self._pcm) < end:
+                audio = self._get_audio(timeout)
+                if audio is None:
+                    return timestamp, frame, None
+                chunk_start = round(audio[0] * self.rate)
+                if chunk_start != self._pcm_start + len(self._pcm):
+                    # a chunk was dropped, restart the buffer after the gap
+                    self._pcm = self._pcm[:0]
+                    self._pcm_start = chunk_start
+                self._pcm = np.concatenate((self._pcm, audio[1]))
+
+            if self._pcm_start > start:
+                samples = None
+            else:
+                samples = self._pcm[start - self._pcm_start:end - self._pcm_start]
+            used = max(end - self._pcm_start, 0)
+            self._pcm = self._pcm[used:]
+            self._pcm_start += used
+            return timestamp, frame, samples
+
+        def close(self):
+            """Stop ffmpeg and the reader threads."""
+            if self.process:
+                self.process.terminate()
+                self.process.wait()
+                self.process = None
+            for thread in self._threads:
+                thread.join()
+            self._threads = []
+            self._audio_pipe.close()
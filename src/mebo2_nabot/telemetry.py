@@ -0,0 +1,201 @@
+import threading
+import numpy as np
+from .clock import Clock
+from .robot import Robot
+
+#: Layout of a single telemetry sample
+TELEMETRY_DTYPE = np.dtype([
+    ('time', '<f8'),                # wall clock time of the sample from the robot's clock
+    ('arm', '<i2'),                 # joint positions as reported by the robot
+    ('wrist_ud', '<i2'),
+    ('wrist_rotate', '<i2'),
+    ('claw', '<i2'),
+    ('battery_raw', '<i2'),         # raw BAT=? value, 0 until first read
+    ('battery_percent', 'i1'),      # -1 until first read
+    ('rtt', '<f4'),                 # round trip of the latest request in seconds
+    ('wheel_left', '<f4'),          # latest commanded setpoints
+    ('wheel_right', '<f4'),
+    ('arm_speed', '<f4'),
+    ('wrist_ud_speed', '<f4'),
+    ('wrist_rotate_speed', '<f4'),
+    ('claw_setpoint', '<f4')
+])
+
+# file header, the ring of samples follows directly after it
+_HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('capacity', '<u8'),
+    ('count', '<u8')    # total samples written, the ring index is count % capacity
+])
+_MAGIC = b'MEBOTLM1'
+
+_POSITION_FIELDS = {
+    Robot.Position.ARM: 'arm',
+    Robot.Position.WRIST_UD: 'wrist_ud',
+    Robot.Position.WRIST_ROTATE: 'wrist_rotate',
+    Robot.Position.CLAW: 'claw'
+}
+
+_SETPOINT_FIELDS = {
+    Robot.Command.WHEEL_LEFT_FORWARD: 'wheel_left',
+    Robot.Command.WHEEL_RIGHT_FORWARD: 'wheel_right',
+    Robot.Command.ARM_UP: 'arm_speed',
+    Robot.Command.WRIST_UD_UP: 'wrist_ud_speed',
+    Robot.Command.WRIST_ROTATE_LEFT: 'wrist_rotate_speed',
+    Robot.Command.CLAW_POSITION: 'claw_setpoint'
+}
+
+class TelemetryRecorder():
+    """Record robot state into a fixed-size ring buffer backed by a memory-mapped file.
+
+    Every joint query, battery query or command with setpoints appends one
+    sample holding the latest known value of every field. Once ``capacity``
+    samples are written the oldest ones are overwritten, so memory and disk
+    usage stay constant. Other processes can follow the file with TelemetryReader.
+
+    Args:
+        path (str): File to store the ring buffer in, overwritten if it exists
+        capacity (int): Number of samples kept (default 65536)
+    """
+
+    def __init__(self, path, capacity=65536):
+        self.path = path
+        self._lock = threading.Lock()
+        self._header = np.memmap(path, dtype=_HEADER_DTYPE, mode='w+', shape=(1,))
+        self._ring = np.memmap(path, dtype=TELEMETRY_DTYPE, mode='r+',
+                               offset=_HEADER_DTYPE.itemsize, shape=(capacity,))
+        self._header['capacity'] = capacity
+        self._header['count'] = 0
+        self._header['magic'] = _MAGIC
+        self._state = np.zeros(1, dtype=TELEMETRY_DTYPE)
+        self._state['battery_percent'] = -1
+        self._clock = Clock()
+
+    def attach(self, robot):
+        """Start recording telemetry from a robot.
+
+        Args:
+            robot (Robot): Robot to record
+
+        Returns:
+            TelemetryRecorder: This recorder
+        """
+        robot.telemetry = self
+        self._clock = getattr(robot, 'clock', None) or Clock()
+        return self
+
+    def detach(self, robot):
+        """Stop recording telemetry from a robot.
+
+        Args:
+            robot (Robot): Robot to stop recording
+        """
+        if robot.telemetry is self:
+            robot.telemetry = None
+
+    def _append(self):
+        self._state['time'] = self._clock.time()
+        count = int(self._header['count'][0])
+        self._ring[count % len(self._ring)] = self._state[0]
+        # publish the sample only after it is fully written
+        self._header['count'] = count + 1
+
+    def record_joints(self, positions):
+        """Append a sample with new joint positions.
+
+        Args:
+            positions (dict): Position to value, as returned by Robot.get_joint_positions
+        """
+        with self._lock:
+            for position, value in positions.items():
+                self._state[_POSITION_FIELDS[position]] = value
+            self._append()
+
+    def record_battery(self, raw, percent):
+        """Append a sample with a new battery reading.
+
+        Args:
+            raw (int): Raw BAT=? value
+            percent (int): Estimated charge percentage
+        """
+        with self._lock:
+            self._state['battery_raw'] = raw
+            self._state['battery_percent'] = percent
+            self._append()
+
+    def record_command(self, commands, rtt):
+        """Update the link round trip and append a sample if any setpoints changed.
+
+        Args:
+            commands (iterable): (Command, value) pairs sent in the request
+            rtt (float): Seconds until the robot answered
+        """
+        with self._lock:
+            self._state['rtt'] = rtt
+            setpoint = False
+            for cmd, value in commands:
+                field = _SETPOINT_FIELDS.get(cmd)
+                if field and value is not None:
+                    self._state[field] = value
+                    setpoint = True
+            if setpoint:
+                self._append()
+
+    def flush(self):
+        """Flush the ring buffer to disk."""
+        self._ring.flush()
+        self._header.flush()
+
+class TelemetryReader():
+    """Read a telemetry ring buffer that is being written by another process.
+
+    Args:
+        path (str): File written by a TelemetryRecorder
+    """
+
+    def __init__(self, path):
+        self._header = np.memmap(path, dtype=_HEADER_DTYPE, mode='r', shape=(1,))
+        if self._header['magic'][0] != _MAGIC:
+            raise ValueError(f"{path} is not a telemetry file")
+        self.capacity = int(self._header['capacity'][0])
+        self._ring = np.memmap(path, dtype=TELEMETRY_DTYPE, mode='r',
+                               offset=_HEADER_DTYPE.itemsize, shape=(self.capacity,))
+
+    @property
+    def count(self):
+        """int: Total number of samples written so far"""
+        return int(self._header['count'][0])
+
+    def latest(self, n=1):
+        """Return the newest samples in chronological order.
+
+        The result is a view into the shared file unless it wraps around the
+        end of the ring, in which case the two halves are joined into a copy.
+        When the ring is full the oldest returned sample may be overwritten
+        while it is being read.
+
+        Args:
+            n (int, optional): Maximum number of samples (default 1)
+
+        Returns:
+            numpy.ndarray: Samples in TELEMETRY_DTYPE layout
+        """
+        count = self.count
+        n = min(n, count, self.capacity)
+        end = count % self.capacity
+        if end == 0 and count:
+            end = self.capacity
+        if n <= end:
+            return self._ring[end - n:end]
+        return np.concatenate((self._ring[self.capacity - (n - end):], self._ring[:end]))
+
+    def since(self, count):
+        """Return samples written after a previous ``count``.
+
+        Args:
+            count (int): Value of ``count`` at the previous read
+
+        Returns:
+            numpy.ndarray: New samples, limited to what is still in the ring
+        """
+        return self.latest(self.count - count)
@@ -0,0 +1,309 @@
+import logging
+import math
+import threading
+import tkinter as tk
+from .robot import Robot
+
+def differential_drive(turn, throttle):
+    """Map joystick input to wheel speeds.
+
+    Full throttle with no turn drives straight, full turn with no throttle
+    spins on the spot, and diagonals blend the two without exceeding the
+    wheels' range.
+
+    Args:
+        turn (float): -100 (left) to 100 (right)
+        throttle (float): -100 (backward) to 100 (forward)
+
+    Returns:
+        tuple: Left and right wheel speeds from -100 to 100
+    """
+    v = (100 - abs(turn)) * (throttle / 100) + throttle
+    w = (100 - abs(throttle)) * (turn / 100) + turn
+    return round((v + w) / 2), round((v - w) / 2)
+
+class TeleopController():
+    """Send operator setpoints to the robot when they change.
+
+    Widgets call ``set`` or ``drive`` whenever the operator moves them. A
+    background thread sends only the setpoints that changed by at least
+    ``min_change``, so an idle GUI sends nothing. Non-zero speeds are
+    repeated every ``keepalive`` seconds so motion continues while a
+    control is held. The robot serializes its requests, so other threads,
+    such as a GUI polling the battery, can keep using it directly.
+
+    Args:
+        robot (Robot): Robot to control
+        min_change (float): Smallest change of a setpoint that is sent (default 2)
+        keepalive (float): Seconds between repeats of non-zero speeds (default 0.1)
+    """
+
+    SPEEDS = (
+        Robot.Command.WHEEL_LEFT_FORWARD,
+        Robot.Command.WHEEL_RIGHT_FORWARD,
+        Robot.Command.ARM_UP,
+        Robot.Command.WRIST_UD_UP,
+        Robot.Command.WRIST_ROTATE_LEFT
+    )
+
+    def __init__(self, robot, min_change=2, keepalive=0.1):
+        self.robot = robot
+        self.min_change = min_change
+        self.keepalive = keepalive
+        self.logger = logging.getLogger('Teleop')
+        #: dict: Latest value requested for each command
+        self.setpoints = {}
+        #: dict: Last value sent for each command
+        self.sent = {}
+        #: int: Requests sent
+        self.requests = 0
+        self._last_send = -math.inf
+        self._dirty = False
+        self._running = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def set(self, command, value):
+        """Request a new value for a command.
+
+        Args:
+            command (Robot.Command): Joint or wheel command, e.g. Robot.Command.ARM_UP
+            value (float): Speed, or position for CLAW_POSITION
+        """
+        with self._cond:
+            self.setpoints[command] = value
+            self._dirty = True
+            self._cond.notify_all()
+
+    def drive(self, turn, throttle):
+        """Request wheel speeds from joystick input, see differential_drive.
+
+        Args:
+            turn (float): -100 (left) to 100 (right)
+            throttle (float): -100 (backward) to 100 (forward)
+        """
+        left, right = differential_drive(turn, throttle)
+        with self._cond:
+            self.setpoints[Robot.Command.WHEEL_LEFT_FORWARD] = left
+            self.setpoints[Robot.Command.WHEEL_RIGHT_FORWARD] = right
+            self._dirty = True
+            self._cond.notify_all()
+
+    def pending(self, now):
+        """Return the commands that should be sent now.
+
+        Args:
+            now (float): Current time on the robot's clock
+
+        Returns:
+            dict: Command to value, empty if nothing needs sending
+        """
+        with self._cond:
+            setpoints = dict(self.setpoints)
+
+        commands = {}
+        for command, value in setpoints.items():
+            last = self.sent.get(command)
+            if last is None or abs(value - last) >= self.min_change or (value == 0 and last != 0):
+                commands[command] = value
+
+        if now - self._last_send >= self.keepalive:
+            for command in self.SPEEDS:
+                if setpoints.get(command):
+                    commands[command] = setpoints[command]
+        return commands
+
+    def update(self):
+        """Send pending commands.
+
+        Returns:
+            dict: Commands sent, empty if nothing was sent
+        """
+        now = self.robot.clock.monotonic()
+        commands = self.pending(now)
+        if commands:
+            self.robot.send_joint_values(commands)
+            self.sent.update(commands)
+            self.requests += 1
+            self._last_send = now
+        return commands
+
+    def start(self):
+        """Start sending setpoints in a background thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Zero all speeds, send them and stop the background thread."""
+        with self._cond:
+            for command in self.SPEEDS:
+                if command in self.setpoints:
+                    self.setpoints[command] = 0
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.update()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._dirty or not self._running, self.keepalive)
+                self._dirty = False
+                if not self._running:
+                    break
+            try:
+                self.update()
+            except Exception as e:
+                self.logger.warning(f"Failed to send setpoints: {e}")
+
+class Joystick(tk.Canvas):
+    """Retained-mode joystick widget.
+
+    The base and knob are created once and the knob is moved with
+    ``coords`` on every drag, so the canvas holds the same two items for
+    the whole session. The knob springs back to the centre on release.
+
+    Args:
+        master: Parent widget
+        size (int): Width and height in pixels (default 400)
+        knob_size (int): Knob diameter in pixels (default 150)
+        command (callable, optional): Called with (x, y) when the position changes
+        **kwargs: Passed to tk.Canvas
+    """
+
+    def __init__(self, master, size=400, knob_size=150, command=None, **kwargs):
+        super().__init__(master, width=size, height=size, highlightthickness=0, **kwargs)
+        self.diameter = size
+        self.knob_size = knob_size
+        self.command = command
+        #: int: Horizontal position, -100 (left) to 100 (right)
+        self.x = 0
+        #: int: Vertical position, -100 (down) to 100 (up)
+        self.y = 0
+        self._center = size / 2
+        self._reach = (size - knob_size) / 2
+
+        self.create_oval(0, 0, size, size, fill='black', outline='gray')
+        self._knob = self.create_oval(0, 0, knob_size, knob_size, fill='gray')
+        self._place(0, 0)
+
+        self.bind('<Button-1>', self._drag)
+        self.bind('<B1-Motion>', self._drag)
+        self.bind('<ButtonRelease-1>', self._release)
+
+    def _place(self, dx, dy):
+        """Move the knob to an offset from the centre in pixels."""
+        r = self.knob_size / 2
+        cx, cy = self._center + dx, self._center + dy
+        self.coords(self._knob, cx - r, cy - r, cx + r, cy + r)
+
+    def _drag(self, event):
+        dx, dy = event.x - self._center, event.y - self._center
+        distance = math.hypot(dx, dy)
+        if distance > self._reach:
+            dx, dy = dx * self._reach / distance, dy * self._reach / distance
+        if self.x == 0 and self.y == 0:
+            self.itemconfigure(self._knob, fill='blue')
+        self._place(dx, dy)
+        self._set(round(dx * 100 / self._reach), round(-dy * 100 / self._reach))
+
+    def _release(self, event):
+        self.itemconfigure(self._knob, fill='gray')
+        self._place(0, 0)
+        self._set(0, 0)
+
+    def _set(self, x, y):
+        if (x, y) != (self.x, self.y):
+            self.x, self.y = x, y
+            if self.command:
+                self.command(x, y)
+
+class Slider(tk.Canvas):
+    """Retained-mode slider widget.
+
+    Like the joystick the track and knob are created once and the knob is
+    moved in place. A spring slider returns to ``rest`` on release, which
+    suits speed controls; otherwise it keeps its position.
+
+    Args:
+        master: Parent widget
+        from_ (float): Value at the left or top end (default -100)
+        to (float): Value at the right or bottom end (default 100)
+        orient (str): "horizontal" or "vertical" (default "horizontal")
+        length (int): Length in pixels (default 200)
+        thickness (int): Width across the track in pixels (default 30)
+        spring (bool): Return to rest on release (default True)
+        rest (float): Initial value and spring position (default 0)
+        label (str, optional): Text drawn on the track
+        command (callable, optional): Called with the value when it changes
+        **kwargs: Passed to tk.Canvas
+    """
+
+    def __init__(self, master, from_=-100, to=100, orient="horizontal", length=200, thickness=30,
+                 spring=True, rest=0, label=None, command=None, **kwargs):
+        horizontal = orient == "horizontal"
+        width, height = (length, thickness) if horizontal else (thickness, length)
+        super().__init__(master, width=width, height=height, highlightthickness=0, **kwargs)
+        self.from_ = from_
+        self.to = to
+        self.horizontal = horizontal
+        self.length = length
+        self.thickness = thickness
+        self.spring = spring
+        self.rest = rest
+        self.command = command
+        self.value = rest
+
+        self.create_rectangle(0, 0, width, height, fill='black', outline='gray')
+        if label:
+            self.create_text(width / 2, height / 2, text=label, fill='gray')
+        self._knob = self.create_rectangle(0, 0, 0, 0, fill='gray')
+        self._place(rest)
+
+        self.bind('<Button-1>', self._drag)
+        self.bind('<B1-Motion>', self._drag)
+        self.bind('<ButtonRelease-1>', self._release)
+
+    def _place(self, value):
+        """Move the knob to the position of a value."""
+        half = self.thickness / 2
+        offset = half + (value - self.from_) / (self.to - self.from_) * (self.length - self.thickness)
+        if self.horizontal:
+            self.coords(self._knob, offset - half, 0, offset + half, self.thickness)
+        else:
+            self.coords(self._knob, 0, offset - half, self.thickness, offset + half)
+
+    def _drag(self, event):
+        position = event.x if self.horizontal else event.y
+        fraction = (position - self.thickness / 2) / (self.length - self.thickness)
+        value = self.from_ + min(1.0, max(0.0, fraction)) * (self.to - self.from_)
+        self.itemconfigure(self._knob, fill='blue')
+        self.set(round(value))
+
+    def _release(self, event):
+        self.itemconfigure(self._knob, fill='gray')
+        if self.spring:
+            self.set(self.rest)
+
+    def get(self):
+        """Return the current value.
+
+        Returns:
+            float: Slider value
+        """
+        return self.value
+
+    def set(self, value):
+        """Move the slider to a value.
+
+        Args:
+            value (float): New value, between from_ and to
+        """
+        if value != self.value:
+            self.value = value
+            self._place(value)
+            if self.command:
+                self.command(value)
@@ -0,0 +1,156 @@
+import re
+from collections import namedtuple
+import requests
+from .clock import Clock
+
+class HttpTransport():
+    """Send command requests to the robot over HTTP.
+
+    Args:
+        host (str): Robot address (default "192.168.99.1")
+        timeout (float): Seconds to wait for a response (default 1)
+    """
+
+    def __init__(self, host="192.168.99.1", timeout=1):
+        self.host = host
+        self.timeout = timeout
+
+    def get(self, url):
+        """Send a request.
+
+        Args:
+            url (str): URL to request
+
+        Returns:
+            requests.Response: The response
+
+        Raises:
+            requests.RequestException: If the request fails
+        """
+        return requests.get(url=url, verify=False, timeout=self.timeout)
+
+    def wake(self):
+        """Try to reopen the command port after a failed request."""
+        # sometimes port 80 closes, poking 554 (RTSP) seems to open it back up
+        try: requests.get(f"http://{self.host}:554", timeout=self.timeout)
+        except: pass
+
+#: A request received by FakeTransport, time is from its clock
+FakeRequest = namedtuple('FakeRequest', ['time', 'url', 'messages'])
+
+class FakeResponse():
+    """Response returned by FakeTransport."""
+
+    def __init__(self, data):
+        self.data = data
+        self.status_code = 200
+
+    def json(self):
+        """Return the response data.
+
+        Returns:
+            dict: Parsed JSON
+        """
+        return self.data
+
+class FakeTransport():
+    """In-process stand-in for the robot that records every request.
+
+    Commands are decoded and applied to a simple model of the robot: joint
+    speed commands move the joints at ``joint_speed`` position units per
+    second per unit of speed, measured on the clock, and queries are
+    answered from the model. Paired with a VirtualClock a whole motion
+    script runs in milliseconds and ``requests`` holds the exact order and
+    timing of everything sent.
+
+    Args:
+        clock (Clock, optional): Clock used to timestamp requests and move joints (default real time)
+        latency (float): Seconds each request takes, slept on the clock (default 0.0)
+        joint_speed (float): Position units per second per unit of joint speed (default 1.0)
+        battery (int): Raw value answered to BAT=? (default 700)
+        failures (int): Number of requests to fail before answering, to test retries (default 0)
+    """
+
+    # joint query name and direction each speed command moves it in
+    JOINTS = {'G': ('ARM', -1), 'H': ('WRIST_UD', 1), 'I': ('WRIST_ROTATE', 1)}
+    BASE64 = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+    def __init__(self, clock=None, latency=0.0, joint_speed=1.0, battery=700, failures=0):
+        self.clock = clock or Clock()
+        self.latency = latency
+        self.joint_speed = joint_speed
+        self.failures = failures
+        #: list: FakeRequest for every request received
+        self.requests = []
+        #: dict: Model state, joint positions, battery value and registers
+        self.state = {'ARM': 50, 'WRIST_UD': 50, 'WRIST_ROTATE': 50, 'CLAW': 0, 'BAT': battery, 'VER': 'FAKE'}
+        #: dict: Current speed of each joint and wheel
+        self.speeds = {'ARM': 0, 'WRIST_UD': 0, 'WRIST_ROTATE': 0, 'WHEEL_LEFT': 0, 'WHEEL_RIGHT': 0}
+        self._last_update = self.clock.monotonic()
+
+    def _decode_value(self, chars):
+        value = self.BASE64.index(chars[0]) | self.BASE64.index(chars[1]) << 6
+        return value - 4096 if value >= 2048 else value
+
+    def _update_joints(self):
+        now = self.clock.monotonic()
+        elapsed = now - self._last_update
+        self._last_update = now
+        for letter, (joint, direction) in self.JOINTS.items():
+            moved = self.state[joint] + direction * self.speeds[joint] * self.joint_speed * elapsed
+            self.state[joint] = max(0.0, min(100.0, moved))
+
+    def _apply(self, message):
+        """Apply one decoded message to the model and return its answer."""
+        query = re.fullmatch(r'(\w+)=\?', message)
+        if query:
+            name = query.group(1)
+            value = self.state.get(name, 0)
+            return f"{name}={round(value) if isinstance(value, float) else value}"
+        register = re.fullmatch(r'(REG\d{3})=(.*)', message)
+        if register:
+            self.state[register.group(1)] = register.group(2)
+            return message
+
+        # movement messages are "!" + counter + command letter + two value characters
+        if message.startswith('!') and len(message) == 5:
+            letter, value = message[2], self._decode_value(message[3:])
+            if letter in self.JOINTS:
+                self.speeds[self.JOINTS[letter][0]] = value
+            elif letter == 'F':
+                self.speeds['WHEEL_LEFT'] = value
+            elif letter == 'E':
+                self.speeds['WHEEL_RIGHT'] = value
+            elif letter == 'N':
+                self.state['CLAW'] = max(0, min(100, value))
+        return message
+
+    def get(self, url):
+        """Answer a request.
+
+        Args:
+            url (str): Request URL as built by Robot
+
+        Returns:
+            FakeResponse: Answers to the commands in the request
+
+        Raises:
+            requests.ConnectionError: While failures remain
+        """
+        self.clock.sleep(self.latency)
+        if self.failures > 0:
+            self.failures -= 1
+            raise requests.ConnectionError("Fake request failure")
+
+        self._update_joints()
+        messages = [
+            match.group(1) or match.group(2)
+            for match in re.finditer(r'command\d+=(?:mebolink_message_send\((.*?)\)|([^&]*))(?:&|$)', url)
+        ]
+        self.requests.append(FakeRequest(self.clock.monotonic(), url, messages))
+
+        answers = [self._apply(message) for message in messages]
+        return FakeResponse({'response': answers[0] if len(answers) == 1 else answers})
+
+    def wake(self):
+        """Nothing to wake up."""
@@ -0,0 +1,245 @@
+import time
+import cv2
+import numpy as np
+
+class Preprocessor():
+    """Turn camera frames into model input without per-frame allocations.
+
+    Frames are resized (letterboxed to keep their aspect ratio by default),
+    converted from BGR to RGB and written straight into a reusable batch
+    array laid out as NCHW or NHWC. ``float32`` output is scaled to 0-1.
+
+    Args:
+        size (tuple): Model input (width, height) (default (640, 640))
+        batch_size (int): Number of frames in the batch array (default 1)
+        layout (str): "NCHW" or "NHWC" (default "NCHW")
+        dtype (str): "float32" or "uint8" (default "float32")
+        letterbox (bool): Keep the aspect ratio and pad, otherwise stretch (default True)
+        rgb (bool): Convert to RGB channel order (default True)
+        pad_value (int): Value of the letterbox padding (default 114)
+    """
+
+    def __init__(self, size=(640, 640), batch_size=1, layout="NCHW", dtype="float32",
+                 letterbox=True, rgb=True, pad_value=114):
+        if layout not in ("NCHW", "NHWC"):
+            raise ValueError(f"Unsupported layout: {layout}")
+        if dtype not in ("float32", "uint8"):
+            raise ValueError(f"Unsupported dtype: {dtype}")
+
+        self.width, self.height = size
+        self.layout = layout
+        self.dtype = np.dtype(dtype)
+        self.letterbox = letterbox
+        self.rgb = rgb
+        self.pad_value = pad_value
+
+        shape = (3, self.height, self.width) if layout == "NCHW" else (self.height, self.width, 3)
+        #: numpy.ndarray: Reused output array, overwritten by every call
+        self.batch = np.empty((batch_size,) + shape, dtype=self.dtype)
+        #: list: (scale_x, scale_y, pad_x, pad_y) used for each batch entry, see scale_boxes
+        self.transforms = [(1.0, 1.0, 0, 0)] * batch_size
+
+        self._canvas = np.full((self.height, self.width, 3), pad_value, dtype=np.uint8)
+        self._converted = np.empty_like(self._canvas)
+        self._geometry = None
+
+    def _fit(self, frame):
+        """Resize a frame into the canvas and return (scale_x, scale_y, pad_x, pad_y)."""
+        frame_h, frame_w = frame.shape[:2]
+        if not self.letterbox:
+            cv2.resize(frame, (self.width, self.height), dst=self._canvas, interpolation=cv2.INTER_LINEAR)
+            return (self.width / frame_w, self.height / frame_h, 0, 0)
+
+        scale = min(self.width / frame_w, self.height / frame_h)
+        new_w, new_h = round(frame_w * scale), round(frame_h * scale)
+        pad_x, pad_y = (self.width - new_w) // 2, (self.height - new_h) // 2
+
+        # padding only needs refilling when the frame geometry changes
+        if self._geometry != (frame_w, frame_h):
+            self._canvas[:] = self.pad_value
+            self._geometry = (frame_w, frame_h)
+
+        cv2.resize(frame, (new_w, new_h), dst=self._canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w],
+                   interpolation=cv2.INTER_LINEAR)
+        return (scale, scale, pad_x, pad_y)
+
+    def __call__(self, frame, index=0):
+        """Preprocess one BGR frame into an entry of the batch array.
+
+        Args:
+            frame (numpy.ndarray): BGR frame as returned by Robot.Camera.read
+            index (int, optional): Batch entry to write (default 0)
+
+        Returns:
+            numpy.ndarray: View of the batch with only that entry (shape 1 x ...)
+        """
+        self.transforms[index] = self._fit(frame)
+
+        image = self._canvas
+        if self.rgb:
+            cv2.cvtColor(self._canvas, cv2.COLOR_BGR2RGB, dst=self._converted)
+            image = self._converted
+        if self.layout == "NCHW":
+            image = image.transpose(2, 0, 1)
+
+        out = self.batch[index]
+        if self.dtype == np.float32:
+            np.multiply(image, np.float32(1 / 255), out=out, casting='unsafe')
+        else:
+            np.copyto(out, image)
+        return self.batch[index:index + 1]
+
+    def batch_frames(self, frames):
+        """Preprocess several frames into the batch array.
+
+        Args:
+            frames (list): BGR frames, at most batch_size
+
+        Returns:
+            numpy.ndarray: View of the batch holding the frames
+        """
+        if len(frames) > len(self.batch):
+            raise ValueError(f"Got {len(frames)} frames for a batch of {len(self.batch)}")
+        for i, frame in enumerate(frames):
+            self(frame, i)
+        return self.batch[:len(frames)]
+
+    def read(self, cameras):
+        """Read one frame from each camera and preprocess them as a batch.
+
+        Args:
+            cameras (list): Opened Robot.Camera instances, or a single camera
+
+        Returns:
+            numpy.ndarray: View of the batch, or None if any camera failed to deliver a frame
+        """
+        if not isinstance(cameras, (list, tuple)):
+            cameras = [cameras]
+        frames = [camera.read() for camera in cameras]
+        if any(frame is None for frame in frames):
+            return None
+        return self.batch_frames(frames)
+
+    def scale_boxes(self, boxes, index=0):
+        """Map boxes from model input coordinates back to the original frame.
+
+        Args:
+            boxes (numpy.ndarray): N x 4 array of x1, y1, x2, y2 in model input pixels
+            index (int, optional): Batch entry the boxes were detected in (default 0)
+
+        Returns:
+            numpy.ndarray: Boxes in original frame pixels
+        """
+        scale_x, scale_y, pad_x, pad_y = self.transforms[index]
+        boxes = np.asarray(boxes, dtype=np.float32)
+        return (boxes - np.array([pad_x, pad_y] * 2, dtype=np.float32)) / np.array([scale_x, scale_y] * 2, dtype=np.float32)
+
+class SceneChangeGate():
+    """Let frames through only when the scene changes.
+
+    Each frame is shrunk to a small grayscale image and compared with a
+    running background. A frame passes when enough pixels inside the
+    watched regions differ from the background, or when no frame has passed
+    for ``keyframe_interval`` seconds.
+
+    Args:
+        width (int): Width of the downsampled image, height follows the aspect ratio (default 64)
+        threshold (int): Gray level difference that counts as a changed pixel (default 25)
+        sensitivity (float): Fraction of watched pixels that must change (default 0.01)
+        learning_rate (float): How quickly the background follows the scene (default 0.05)
+        keyframe_interval (float, optional): Pass a frame at least this often in seconds, None to disable (default 5.0)
+        regions (list, optional): (x1, y1, x2, y2) boxes as fractions of the frame to watch, whole frame if omitted
+    """
+
+    def __init__(self, width=64, threshold=25, sensitivity=0.01, learning_rate=0.05,
+                 keyframe_interval=5.0, regions=None):
+        self.width = width
+        self.threshold = threshold
+        self.sensitivity = sensitivity
+        self.learning_rate = learning_rate
+        self.keyframe_interval = keyframe_interval
+        self.regions = regions
+        #: float: Fraction of watched pixels that changed in the last frame
+        self.score = 0.0
+        self._background = None
+        self._last_pass = None
+
+    def _setup(self, frame):
+        frame_h, frame_w = frame.shape[:2]
+        height = max(1, round(self.width * frame_h / frame_w))
+        self._small = np.empty((height, self.width) + frame.shape[2:], dtype=np.uint8)
+        self._gray = np.empty((height, self.width), dtype=np.uint8)
+        self._diff = np.empty((height, self.width), dtype=np.float32)
+        self._changed = np.empty((height, self.width), dtype=bool)
+
+        self._mask = np.zeros((height, self.width), dtype=bool)
+        for x1, y1, x2, y2 in self.regions or [(0, 0, 1, 1)]:
+            self._mask[round(y1 * height):round(y2 * height), round(x1 * self.width):round(x2 * self.width)] = True
+        self._watched = max(1, int(self._mask.sum()))
+
+    def __call__(self, frame, now=None):
+        """Check whether a frame should be passed on.
+
+        Args:
+            frame (numpy.ndarray): BGR or grayscale frame
+            now (float, optional): time.monotonic() of the frame, defaults to now
+
+        Returns:
+            bool: True if the scene changed or a keyframe is due
+        """
+        now = time.monotonic() if now is None else now
+        if self._background is None or self._background.shape[1] != self.width:
+            self._setup(frame)
+
+        cv2.resize(frame, self._small.shape[1::-1], dst=self._small, interpolation=cv2.INTER_AREA)
+        if self._small.ndim == 3:
+            cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        else:
+            np.copyto(self._gray, self._small)
+
+        if self._background is None or self._background.shape != self._gray.shape:
+            self._background = self._gray.astype(np.float32)
+            self._last_pass = now
+            self.score = 1.0
+            return True
+
+        np.subtract(self._gray, self._background, out=self._diff)
+        np.abs(self._diff, out=self._diff)
+        np.greater(self._diff, self.threshold, out=self._changed)
+        self._changed &= self._mask
+        self.score = int(self._changed.sum()) / self._watched
+        cv2.accumulateWeighted(self._gray, self._background, self.learning_rate)
+
+        if self.score >= self.sensitivity or (
+            self.keyframe_interval is not None and now - self._last_pass >= self.keyframe_interval
+        ):
+            self._last_pass = now
+            return True
+        return False
+
+    def filter(self, frames):
+        """Generator that yields only the frames that pass the gate.
+
+        Args:
+            frames (iterable): Frames to check
+
+        Yields:
+            numpy.ndarray: Frames with a scene change, and keyframes
+        """
+        for frame in frames:
+            if self(frame):
+                yield frame
+
+    def read(self, camera):
+        """Read from a camera until a frame passes the gate.
+
+        Args:
+            camera (Robot.Camera): Opened camera
+
+        Returns:
+            numpy.ndarray: Frame that passed, or None if the camera stopped delivering frames
+        """
+        while True:
+            frame = camera.read()
+            if frame is None or self(frame):
+                return frame